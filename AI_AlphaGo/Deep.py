@@ -8,10 +8,12 @@ from Constant import RED, YELLOW, IDLE
 from Simulation.Board import ConnectFourBoard
 
 class Deep:
-    def __init__(self, color=RED, timeout=None, path = "DL/Files/mymodel21.keras"):
+    def __init__(self, color=RED, timeout=None, path = "DL/Files/mymodel21.keras", eval_cache=None):
         self.name = 'DEEP AI'
         self.color = color
         self.path = path
+        self.model = None               # Model được load 1 lần ở nước đi đầu tiên
+        self.eval_cache = eval_cache    # EvaluationCache cho kết quả predict, None để tắt
     
     def set_color(self, color: int):
         """Set the color of the AI."""
@@ -27,12 +29,20 @@ class Deep:
                     board[i][j] = 1
         return board
 
-    def get_move(self, game: ConnectFourBoard):
+    def load_model(self):
         model_path = os.path.abspath(self.path)
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found: {model_path}")
+        return tf.keras.models.load_model(model_path)
+
+    def predict(self, game: ConnectFourBoard):
+        """Xác suất chọn từng cột của model cho 'game'."""
+        board_input = np.array(game.board).reshape(-1, game.rows, game.columns, 1)
+        return self.model.predict(board_input)[0]
 
-        model = tf.keras.models.load_model(model_path)
+    def get_move(self, game: ConnectFourBoard):
+        if self.model is None:
+            self.model = self.load_model()
         
         board = game.board.copy()
         if self.color == -1:
@@ -42,8 +52,13 @@ class Deep:
                         board[i][j] *= -1   
             print("chan", board)
 
-        board_input = np.array(game.board).reshape(-1, 6,7, 1)
-        col_probs = model.predict(board_input)[0]
+        # Thế cờ và ảnh đối xứng trái-phải dùng chung 1 dự đoán (luật chơi đối xứng, model thì không bắt buộc),
+        # xác suất theo cột được lật ngược cho ảnh đối xứng
+        if self.eval_cache is not None:
+            col_probs = self.eval_cache.get(game, lambda: self.predict(game), flip=lambda probs: probs[::-1].copy(),
+                                            tag=self.path)    # Nhiều model có thể dùng chung 1 cache
+        else:
+            col_probs = self.predict(game)
         print("output model", col_probs)
         col = np.argmax(col_probs)
 
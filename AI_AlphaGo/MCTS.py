@@ -1,7 +1,6 @@
 
 import random
 import time
-from copy import deepcopy
 from math import sqrt, log
 
 
@@ -11,9 +10,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from Simulation.Board import ConnectFourBoard
 from Constant import RED, YELLOW, IDLE 
+from AI_AlphaGo.opening_book import book_move
+from AI_AlphaGo.search_stats import SearchStats
 
 class MonteCarloTreeSearch :
-    def __init__ (self, color=RED, num_rollouts=1000, temperature=sqrt(2), max_time=1.5) :
+    def __init__ (self, color=RED, num_rollouts=1000, temperature=sqrt(2), max_time=1.5, book=None) :
         
         self.num_rollouts = num_rollouts
         self.temperature = temperature
@@ -21,6 +22,8 @@ class MonteCarloTreeSearch :
 
         self.color = color
         self.name = 'Monte Carlo Tree Search'
+        self.book = book                # OpeningBook, tra trước khi chạy rollout
+        self.last_stats = None          # SearchStats của nước đi gần nhất
 
     def set_color(self, color) :
         self.color = color
@@ -37,6 +40,13 @@ class MonteCarloTreeSearch :
         Returns:
             The best move as column index
         """
+        stats = self.last_stats = SearchStats(self.name)
+        hit = book_move(self.book, game)
+        stats.lap('book')
+        if hit is not None :
+            stats.finish('book')
+            return hit
+
         # Get valid columns (non-full columns)
         valid_columns = game.get_available_columns()
         
@@ -56,6 +66,10 @@ class MonteCarloTreeSearch :
         
         start_time = time.time()
         rollouts_completed = 0
+
+        # Rollouts are played in place on one copy of the board and rewound afterwards
+        root = game.copy()
+        root_ply = len(root.moves)
         
         # Run simulations until we reach the limit rollout or timeout
         while rollouts_completed < self.num_rollouts and (time.time() - start_time) < self.time_limit :
@@ -63,14 +77,15 @@ class MonteCarloTreeSearch :
             move = select(game, self.temperature, counts, wins, losses)
                 
             # Expand the game state with the selected move
-            game_clone = expand(game, move)
+            game_clone = expand(root, move)
                 
             # Skip invalid moves
             if game_clone is None:
                 continue
                     
-            # Simulate a random game from this state
+            # Simulate a random game from this state, then rewind back to the root
             reward = simulate(game_clone)
+            root.rewind(root_ply)
                 
             # Update statistics
             counts, wins, losses = backpropagate(game.turn, move, reward, counts, wins, losses)
@@ -79,23 +94,27 @@ class MonteCarloTreeSearch :
 
             # print(counts.values(), ' ', wins.values(), ' ', losses.values(), '\n')
 
+        stats.lap('rollout')
+        stats.nodes = stats.rollouts = rollouts_completed
+        stats.finish('rollout')
+
         # Choose the best move based on the statistics
         return next_move(game, counts, wins, losses, valid_columns)
     
 def expand(game, move:int):
-    """Create a new game state by applying the move."""
-    game_copy = game.copy()
+    """Apply the move on the game state in place (revert it with game.undo()/game.rewind())."""
     # Check if the move is valid before applying
-    if game_copy.drop_piece(move):
-        return game_copy
+    if move is not None and game.can_play(move):
+        game.play(move)
+        return game
     
     # Return None for invalid moves
     return None
 
 def simulate(game_clone:ConnectFourBoard):
-    """Simulate a random game from the current state until completion."""
+    """Simulate a random game from the current state until completion. Moves are played in place."""
     # Check if the game is already over
-    if game_clone.check_win(-game_clone.turn) :
+    if game_clone.last_move_won() :
         return -game_clone.turn
         
         # Check for a draw
@@ -117,10 +136,11 @@ def simulate(game_clone:ConnectFourBoard):
                 
         move = random.choice(valid_columns)
             
-        if game_clone.drop_piece(move):
-            # Check if the last move resulted in a win
-            if game_clone.check_win(game_clone.turn):
-                return game_clone.turn
+        if game_clone.can_play(move):
+            game_clone.play(move)
+            # Check if the last move resulted in a win (the winner is the side that just moved)
+            if game_clone.last_move_won():
+                return -game_clone.turn
                     
             # Check for a draw
             if game_clone.is_full() :
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Simulation.Board import ConnectFourBoard
+
+
+ENTRY_OVERHEAD = 200        # Ước lượng byte cho 1 entry ngoài giá trị: key int, node của OrderedDict, tuple
+DEFAULT_CACHE_BYTES = 64 << 20
+
+
+class EvaluationCache :
+    ###
+    #   Cache LRU cho các hàm đánh giá thế cờ (OrderedDict: entry mới dùng ở cuối, đầy thì bỏ entry ở đầu).
+    #       key         :   canonical_key() của ConnectFourBoard, thế cờ và ảnh đối xứng trái-phải dùng chung 1 entry.
+    #                       Giá trị được lưu theo hướng của thế cờ canonical; giá trị theo từng cột (vd. xác suất
+    #                       chọn cột của model) cần hàm 'flip' để lật lại khi thế cờ đang tra là ảnh đối xứng
+    #       max_bytes   :   giới hạn bộ nhớ (ước lượng bằng nbytes của mảng numpy, hoặc sys.getsizeof, + ENTRY_OVERHEAD)
+    #       tag         :   tách các không gian key trên cùng 1 cache, vd. màu quân của evaluator
+    #       mirror      :   False nếu hàm đánh giá không đối xứng trái-phải (vd. 'cột giữa' = columns // 2 khi số cột chẵn),
+    #                       khi đó key là hash_key, không dùng chung với ảnh đối xứng
+    #
+    #   Thống kê: hits, misses, evictions, hit_rate()
+    #
+    #   Dùng:
+    #       cache = EvaluationCache(max_bytes=16 << 20)
+    #       value = cache.get(game, lambda: evaluate(game))
+    ###
+
+    def __init__(self, max_bytes:int =DEFAULT_CACHE_BYTES) :
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) :
+        return len(self.entries)
+
+    def clear(self) :
+        self.entries.clear()
+        self.bytes = 0
+
+    def get(self, game:ConnectFourBoard, compute, flip=None, tag=None, mirror:bool =True) :
+        """Giá trị đánh giá của 'game': lấy từ cache nếu có, ngược lại gọi compute() rồi lưu lại.
+        flip(value): giá trị của ảnh đối xứng, None nếu giá trị không đổi khi lật bàn cờ."""
+
+        key = game.canonical_key() if mirror else game.hash_key
+        mirrored = key != game.hash_key
+        if tag is not None :
+            key = (tag, key)
+
+        entry = self.entries.get(key)
+        if entry is not None :
+            self.hits += 1
+            self.entries.move_to_end(key)
+            value = entry[0]
+        else :
+            self.misses += 1
+            value = compute()
+            if mirrored and flip is not None :
+                value = flip(value)
+            self.put(key, value)
+
+        if mirrored and flip is not None :
+            return flip(value)
+        return value
+
+    def put(self, key, value) :
+        # View (vd. 1 dòng của kết quả predict) giữ cả mảng gốc: lưu bản sao để nbytes đúng với bộ nhớ bị giữ
+        if isinstance(value, np.ndarray) and value.base is not None :
+            value = value.copy()
+        size = ENTRY_OVERHEAD + (value.nbytes if isinstance(value, np.ndarray) else sys.getsizeof(value))
+        if size > self.max_bytes :
+            return
+
+        old = self.entries.pop(key, None)
+        if old is not None :
+            self.bytes -= old[1]
+        self.entries[key] = (value, size)
+        self.bytes += size
+
+        while self.bytes > self.max_bytes :
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def hit_rate(self) :
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
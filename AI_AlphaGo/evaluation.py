@@ -0,0 +1,148 @@
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Simulation.Board import winning_windows
+from Constant import RED, YELLOW
+
+
+def window_score_table(weight:list[float]) :
+    """Bảng điểm (5, 5) của 1 cửa sổ 4 ô, index [số quân mình, số quân đối thủ].
+
+    Cùng ý nghĩa với DEFAULT_WEIGHT = [allie_3, allie_2, enemy_3, enemy_2, center]:
+    cửa sổ chỉ có quân của 1 bên (còn lại là ô trống) mới được tính điểm.
+    """
+    table = np.zeros((5, 5), dtype=np.float64)
+    table[3, 0] = weight[0]
+    table[2, 0] = weight[1]
+    table[0, 3] = -weight[2]
+    table[0, 2] = -weight[3]
+    return table
+
+
+def window_pattern_table(weight:list[float], color:int) :
+    """Điểm của cả 81 mẫu cửa sổ 4 ô theo góc nhìn 'color'.
+
+    Mẫu được mã hoá theo hệ cơ số 3, mỗi ô là 1 chữ số (cell + 1): 0 = YELLOW, 1 = IDLE, 2 = RED.
+    """
+    cells = np.array(np.meshgrid(*[np.arange(3)] * 4, indexing='ij')).reshape(4, -1).T - 1
+    own = np.count_nonzero(cells == color, axis=1)
+    opp = np.count_nonzero(cells == -color, axis=1)
+    return window_score_table(weight)[own, opp]
+
+
+class WindowEvaluator :
+    ###
+    #   Đánh giá heuristic của MinimaxAI, tính bằng 1 lần gather trên các cửa sổ thắng (winning_windows)
+    #   rồi tra bảng theo mẫu của từng cửa sổ.
+    #       windows     :   (n_windows, 4) chỉ số phẳng các ô của từng cửa sổ, dùng chung theo kích thước bàn cờ
+    #       patterns    :   {color: window_pattern_table(weight, color)}
+    #       center      :   chỉ số phẳng các ô của cột giữa
+    #
+    #   Board có thể là 1 bàn cờ (rows, columns) hoặc nhiều bàn cờ (..., rows, columns).
+    ###
+
+    PATTERN_DIGITS = np.array([27, 9, 3, 1], dtype=np.intp)
+
+    def __init__(self, shape:tuple[int, int], weight:list[float]) :
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.windows = winning_windows(self.shape)
+        self.patterns = {color: window_pattern_table(weight, color) for color in (RED, YELLOW)}
+        self.center_weight = weight[4]
+
+        rows, columns = self.shape
+        self.center = np.arange(rows) * columns + columns // 2
+
+    def __call__(self, board:np.ndarray, color:int) :
+        """Điểm của 'board' theo góc nhìn của 'color'."""
+
+        flat = board.reshape(board.shape[:-2] + (-1,)).astype(np.intp)
+        codes = (flat[..., self.windows] + 1) @ self.PATTERN_DIGITS
+        score = self.patterns[color][codes].sum(axis=-1)
+
+        # Số quân mình trừ số quân đối thủ ở cột giữa
+        score = score + color * flat[..., self.center].sum(axis=-1) * self.center_weight
+
+        return float(score) if np.ndim(score) == 0 else score
+
+
+class IncrementalEvaluator :
+    ###
+    #   Cùng điểm với WindowEvaluator nhưng được cập nhật dần theo từng nước đi, dùng cho search với play/undo.
+    #       counts          :   {color: [số quân của color trong từng cửa sổ]}
+    #       scores          :   {color: tổng điểm các cửa sổ theo góc nhìn color}
+    #       center_balance  :   số quân RED trừ số quân YELLOW ở cột giữa
+    #       cell_windows    :   các cửa sổ đi qua từng ô (chỉ số phẳng)
+    #
+    #   Mỗi nước đi chỉ cập nhật các cửa sổ đi qua ô vừa đánh (tối đa 13 trên bàn 6x7), đánh giá lá là O(1).
+    #   undo() lấy lại điểm cũ từ stack nên không bị sai số cộng dồn của số thực.
+    ###
+
+    def __init__(self, shape:tuple[int, int], weight:list[float], board:np.ndarray =None) :
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.table = window_score_table(weight).tolist()
+        self.center_weight = weight[4]
+
+        rows, columns = self.shape
+        self.center_column = columns // 2
+
+        windows = winning_windows(self.shape)
+        self.cell_windows = [[] for _ in range(rows * columns)]
+        for index, window in enumerate(windows.tolist()) :
+            for cell in window :
+                self.cell_windows[cell].append(index)
+        self.n_windows = len(windows)
+
+        self.reset(board)
+
+    def reset(self, board:np.ndarray =None) :
+        """Nạp lại toàn bộ từ ma trận bàn cờ (None: bàn cờ trống)."""
+
+        self.counts = {RED: [0] * self.n_windows, YELLOW: [0] * self.n_windows}
+        self.scores = {RED: 0.0, YELLOW: 0.0}
+        self.center_balance = 0
+        self.stack = []
+
+        if board is not None :
+            for r, c in zip(*np.nonzero(board)) :
+                self.play(int(r), int(c), int(board[r, c]))
+            self.stack = []
+
+    def play(self, row:int, column:int, color:int) :
+        """Quân 'color' vừa được đặt vào ô (row, column)."""
+
+        self.stack.append((row, column, color, self.scores[RED], self.scores[YELLOW], self.center_balance))
+
+        own = self.counts[color]
+        opp = self.counts[-color]
+        table = self.table
+        own_delta = 0.0
+        opp_delta = 0.0
+        for window in self.cell_windows[row * self.shape[1] + column] :
+            o = own[window]
+            p = opp[window]
+            own_delta += table[o + 1][p] - table[o][p]
+            opp_delta += table[p][o + 1] - table[p][o]
+            own[window] = o + 1
+
+        self.scores[color] += own_delta
+        self.scores[-color] += opp_delta
+        if column == self.center_column :
+            self.center_balance += color
+
+    def undo(self) :
+        row, column, color, red_score, yellow_score, center_balance = self.stack.pop()
+
+        own = self.counts[color]
+        for window in self.cell_windows[row * self.shape[1] + column] :
+            own[window] -= 1
+
+        self.scores[RED] = red_score
+        self.scores[YELLOW] = yellow_score
+        self.center_balance = center_balance
+
+    def score(self, color:int) :
+        """Điểm hiện tại theo góc nhìn 'color', bằng WindowEvaluator(board, color)."""
+        return self.scores[color] + color * self.center_balance * self.center_weight
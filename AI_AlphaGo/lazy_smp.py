@@ -0,0 +1,102 @@
+import multiprocessing as mp
+import queue
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Simulation.Board import ConnectFourBoard
+from AI_AlphaGo.transposition import TranspositionTable
+
+
+RESULT_WAIT = 2.0       # Thời gian tối đa (giây) chờ 1 helper dừng lại sau khi process chính tìm xong
+
+
+def _helper_main(index:int, tt_name:str, tt_size:int, weight:list[float], tasks, results, stop) :
+    """Vòng lặp của 1 helper process: nhận thế cờ, tìm iterative deepening trên TT dùng chung tới khi bị dừng."""
+
+    from AI_AlphaGo.minimaxVsABPrunning import MinimaxAI
+
+    # TT riêng tối thiểu (1 slot), thay ngay bằng bảng dùng chung
+    ai = MinimaxAI(weight=weight, tt_size=1)
+    ai.tt_size = tt_size
+    ai.tt = TranspositionTable.attach(tt_name, tt_size)
+    ai.stop_event = stop
+
+    while True :
+        task = tasks.get()
+        if task is None :
+            break
+
+        search_id, shape, state, turn, color, start_depth, deadline = task
+        game = ConnectFourBoard(shape, first_to_move=turn)
+        game.board = state
+
+        ai.set_color(color)
+        ai.prepare(game)
+        best_move, scores = ai.iterative_deepening(game, deadline, start_depth=start_depth, finish_first=False)
+        results.put((search_id, index, ai.completed_depth, best_move, scores, ai.nodes))
+
+    ai.tt.close()
+
+
+class LazySMP :
+    ###
+    #   Các helper process cho MinimaxAI(workers=N): N - 1 helper cùng tìm trên thế cờ gốc với process chính,
+    #   dùng chung 1 TranspositionTable trong shared memory. Helper lệch độ sâu bắt đầu (1 hoặc 2) để không đi
+    #   cùng một đường với process chính, kết quả của chúng chủ yếu tới được process chính qua TT.
+    #
+    #       start(game, color, deadline)    :   giao thế cờ cho các helper
+    #       finish()                        :   dừng các helper, trả về list (completed_depth, best_move, scores, nodes)
+    #       close()                         :   tắt các helper process
+    ###
+
+    def __init__(self, helpers:int, tt:TranspositionTable, weight:list[float]) :
+        self.stop = mp.Event()
+        self.results = mp.Queue()
+        self.tasks = []
+        self.processes = []
+        self.search_id = 0
+
+        for index in range(helpers) :
+            tasks = mp.Queue()
+            process = mp.Process(target=_helper_main, daemon=True,
+                                 args=(index, tt.shm.name, tt.size, list(weight), tasks, self.results, self.stop))
+            process.start()
+            self.tasks.append(tasks)
+            self.processes.append(process)
+
+    def start(self, game:ConnectFourBoard, color:int, deadline:float =None) :
+        self.search_id += 1
+        self.stop.clear()
+
+        state = game.board.copy()
+        for index, tasks in enumerate(self.tasks) :
+            tasks.put((self.search_id, game.shape, state, game.turn, color, 1 + (index + 1) % 2, deadline))
+
+    def finish(self) :
+        self.stop.set()
+
+        reports = []
+        pending = len(self.processes)
+        while pending > 0 :
+            try :
+                search_id, index, completed_depth, best_move, scores, nodes = self.results.get(timeout=RESULT_WAIT)
+            except queue.Empty :
+                break
+            if search_id != self.search_id :
+                continue
+            pending -= 1
+            if best_move is not None :
+                reports.append((completed_depth, best_move, scores, nodes))
+        return reports
+
+    def close(self) :
+        for tasks in self.tasks :
+            tasks.put(None)
+        for process in self.processes :
+            process.join(timeout=RESULT_WAIT)
+            if process.is_alive() :
+                process.terminate()
+        self.tasks = []
+        self.processes = []
@@ -1,276 +1,7 @@
-<<<<<<< HEAD
-from Simulation.Board import ConnectFourBoard
-from AI_AlphaGo.MCTS import select, backpropagate, simulate, expand
-from Constant import RED, YELLOW, IDLE 
-from copy import deepcopy
-import random
-import numpy as np
-import math
-import time
-from math import sqrt, log
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import defaultdict
-
-class minimaxAndMcts:
-    def __init__(self, color=RED, timeout=5):
-        self.name = "Enhanced Minimax + MCTS"
-        self.color = color
-        self.max_time = timeout
-        self.exploration_factor = sqrt(2)  # tham so cho UCT
-        self.max_simulations = 1000
-        self.min_simulations = 100 
-        self.heuristic_weights = { # tính điểm cho hàm heuristic
-            'win': 100000,
-            'three_in_row': 1000,
-            'two_in_row': 100,
-            'center_control': 50,
-            'potential_threats': 200
-        }
-        self.stats = defaultdict(lambda: {'count': 0, 'wins': 0, 'losses': 0})
-        
-    def set_color(self, color: int):
-        self.color = color
-    
-    def get_move(self, game: ConnectFourBoard):
-        start_time = time.time()
-        self.stats.clear()  # Reset stats trước mỗi lượt
-        best_move = None
-        best_value = -math.inf if self.color == RED else math.inf
-        
-        available_moves = self.order_moves_by_heuristic(game)
-        print(f"Available moves ordered: {available_moves}")  # Debug
-        
-        for move in available_moves:
-            if time.time() - start_time > self.max_time * 0.9:
-                break
-                
-            temp_game = deepcopy(game)
-            temp_game.drop_piece(move)
-            
-            move_value = self.parallel_mcts(temp_game)
-            print(f"Move {move} value: {move_value}")  # Debug
-            
-            # Sửa lại logic so sánh CHÍNH XÁC
-            if (self.color == RED and move_value > best_value) or \
-            (self.color == YELLOW and move_value < best_value) or \
-            (best_move is None):
-                best_value = move_value
-                best_move = move
-                print(f"New best move: {best_move} (value: {best_value})")  # Debug
-        
-        # Đảm bảo luôn có nước đi hợp lệ
-        if best_move is None and available_moves:
-            best_move = available_moves[0]
-        
-        return best_move, best_value
-    
-    def calculate_depth(self, game:ConnectFourBoard, start_time: time):
-        """lấy độ sâu dựa vào thời điểm, càng về sau tính càng lớn"""
-        remaining_time = self.max_time - (time.time() - start_time)
-        remaining_moves = game.columns - len(game.get_available_columns())
-        depth = 0
-        if remaining_moves < 5:  # Endgame
-            depth = 7
-        elif remaining_moves < 10:
-            depth = 6
-        else:
-            depth = 5
-        
-        # Điều chỉnh theo thời gian còn lại
-        time_per_move = remaining_time / (remaining_moves + 1)
-        if time_per_move > 0.5:  # Nhiều thời gian thì tăng depth
-            depth += 1
-        elif time_per_move < 0.2:  # Ít thời gian thì giảm depth
-            depth = max(2, depth - 1)
-    
-    def order_moves_by_heuristic(self, game: ConnectFourBoard):
-        """Lấy danh sách các nước đi, ưu tiên cột trung tâm"""
-        moves = game.get_available_columns()
-        center = game.columns // 2
-        return sorted(moves, key=lambda x: -abs(x - center))
-    
-    def parallel_mcts(self, game_state):
-        start_time = time.time()
-        local_stats = self.stats
-        
-        with ThreadPoolExecutor() as executor:
-            futures = []
-            for _ in range(self.max_simulations):
-                if time.time() - start_time > self.max_time * 0.8:
-                    break
-                futures.append(executor.submit(
-                    self.run_single_simulation, 
-                    deepcopy(game_state))
-                )
-            
-            for future in as_completed(futures):
-                move, result = future.result()
-                if move is not None:
-                    local_stats[move]['count'] += 1
-                    if result == game_state.turn:
-                        local_stats[move]['wins'] += 1
-                    elif result != IDLE:
-                        local_stats[move]['losses'] += 1
-        
-        # Merge local stats vào global stats (atomic update)
-        for move in local_stats:
-            for key in ['count', 'wins', 'losses']:
-                self.stats[move][key] += local_stats[move][key]
-        
-        # Tính toán giá trị trung bình CHÍNH XÁC
-        move_values = []
-        for move in local_stats:
-            if local_stats[move]['count'] > 0:
-                value = (local_stats[move]['wins'] - local_stats[move]['losses']) / local_stats[move]['count']
-                move_values.append(value)
-        
-        return sum(move_values)/len(move_values) if move_values else 0
-    
-    def run_single_simulation(self, game_state: ConnectFourBoard):
-        """Run one complete MCTS simulation"""
-        current_state = deepcopy(game_state)
-        move = self.select_move(current_state)
-        result = simulate(expand(current_state, move))
-        return move, result
-    
-    def select_move(self, game_state):
-        """Chọn nước đi tốt nhất bằng UCT"""
-        legal_moves = list(game_state.get_available_columns())
-        if not legal_moves:
-            return None
-        
-        print(f"Legal moves: {legal_moves}")  # Debug
-        print(f"Current stats: { {m: self.stats[m] for m in legal_moves} }")  # Debug
-        
-        # Đảm bảo ít nhất 1 move được thử nghiệm
-        unexplored = [m for m in legal_moves if self.stats[m]['count'] == 0]
-        if unexplored:
-            return random.choice(unexplored)
-    
-        # Chọn theo UCT
-        best_move = max(legal_moves, key=lambda m: self.uct_value(game_state, m))
-        print(f"Selected move: {best_move}")  # Debug
-        return best_move
-    
-    def uct_value(self, game_state, move):
-        parent_visits = sum(self.stats[m]['count'] for m in game_state.get_available_columns())
-        if parent_visits == 0:
-            return float('inf')
-        
-        move_stats = self.stats[move]
-        if move_stats['count'] == 0:
-            return float('inf')
-        
-        win_rate = move_stats['wins'] / move_stats['count']
-        exploration = self.exploration_factor * sqrt(log(parent_visits) / move_stats['count'])
-        return win_rate + exploration
-
-    
-    def select_by_heuristic(self, game_state):
-        legal_moves = list(game_state.get_available_columns())
-        center = game_state.columns // 2
-        
-        # Ưu tiên cột gần trung tâm nhất
-        distances = [(abs(m - center), m) for m in legal_moves]
-        _, best_move = min(distances, key=lambda x: x[0])
-        
-        # Thêm 20% xác suất chọn ngẫu nhiên để đa dạng hóa
-        if random.random() < 0.2 and len(legal_moves) > 1:
-            legal_moves.remove(best_move)
-            return random.choice(legal_moves)
-        
-        return best_move 
-    
-    def enhanced_evaluate(self, game):
-        """Advanced heuristic evaluation of board state"""
-        if game.check_win(RED):
-            return self.heuristic_weights['win'] * (1 if self.color == RED else -1)
-        if game.check_win(YELLOW):
-            return self.heuristic_weights['win'] * (1 if self.color == YELLOW else -1)
-        
-        score = 0
-        
-        # Mỗi viên ở giữa đc cộng 50 điểm - cho AI
-        center_col = game.columns // 2
-        center_count = sum(1 for row in range(game.rows) 
-                          if game.board[row][center_col] == self.color)
-        score += center_count * self.heuristic_weights['center_control']
-        
-        # Đếm số đường cho những nước đi có 2, 3, 4 quân liên tiếp
-        red_score, yellow_score = self.count_potential_lines(game)
-        
-        # nếu AI đg chơi thì điểm bằng res - yell và ngược lại
-        if self.color == RED:
-            score += red_score * self.heuristic_weights['three_in_row']
-            score += yellow_score * -self.heuristic_weights['potential_threats']
-        else:
-            score += yellow_score * self.heuristic_weights['three_in_row']
-            score += red_score * -self.heuristic_weights['potential_threats']
-        
-        return score
-    
-    def count_potential_lines(self, game):
-        """Đếm nước đi tiềm năng"""
-        red_score = 0
-        yellow_score = 0
-        
-        # Check horizontal, vertical, and diagonal lines
-        for row in range(game.rows):
-            for col in range(game.columns):
-                if game.board[row][col] == RED:
-                    red_score += self.evaluate_position(game, row, col, RED)
-                elif game.board[row][col] == YELLOW:
-                    yellow_score += self.evaluate_position(game, row, col, YELLOW)
-        
-        return red_score, yellow_score
-    
-    def evaluate_position(self, game, row, col, color):
-        """đánh giá điểm cho mỗi ô"""
-        score = 0
-        
-        # đánh giá 4 hướng: ngang, dọc, chéo trái, chéo phải
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        for dr, dc in directions:
-            line_length = 1 # sô quân
-            empty_spaces = 0 # ô trống
-            
-            r, c = row + dr, col + dc
-            while 0 <= r < game.rows and 0 <= c < game.columns:
-                if game.board[r][c] == color:
-                    line_length += 1
-                elif game.board[r][c] == IDLE:
-                    empty_spaces += 1
-                    break  # Only count consecutive pieces
-                else:
-                    break
-                r += dr
-                c += dc
-            
-            r, c = row - dr, col - dc
-            while 0 <= r < game.rows and 0 <= c < game.columns:
-                if game.board[r][c] == color:
-                    line_length += 1
-                elif game.board[r][c] == IDLE:
-                    empty_spaces += 1
-                    break  # Only count consecutive pieces
-                else:
-                    break
-                r -= dr
-                c -= dc
-            
-            if line_length >= 4:
-                score += 1000  # lớn hơn 4 thì win
-            elif line_length == 3 and empty_spaces >= 1:
-                score += 1000  # gần win
-            elif line_length == 2 and empty_spaces >= 2:
-                score += 100   # bình thường
-        
-=======
 from Simulation.Board import ConnectFourBoard
 from AI_AlphaGo.MCTS import select, backpropagate, simulate, expand
+from AI_AlphaGo.search_stats import SearchStats
 from Constant import RED, YELLOW, IDLE 
-from copy import deepcopy
 import random
 import numpy as np
 import math
@@ -280,13 +11,15 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from collections import defaultdict
 
 class minimaxAndMcts:
-    def __init__(self, color=RED, timeout=5):
+    def __init__(self, color=RED, timeout=5, verbose=False):
         self.name = "Enhanced Minimax + MCTS"
         self.color = color
+        self.verbose = verbose          # In các dòng debug (mỗi rollout in nhiều dòng, chỉ nên bật khi gỡ lỗi)
         self.max_time = timeout
         self.exploration_factor = sqrt(2)  # tham so cho UCT
         self.max_simulations = 1000
         self.min_simulations = 100 
+        self.tree_depth = 3     # Số tầng UCT mỗi rollout đi xuống từ thế cờ ứng viên trước khi chơi ngẫu nhiên
         self.heuristic_weights = { # tính điểm cho hàm heuristic
             'win': 100000,
             'three_in_row': 1000,
@@ -294,29 +27,59 @@ class minimaxAndMcts:
             'center_control': 50,
             'potential_threats': 200
         }
-        self.stats = defaultdict(lambda: {'count': 0, 'wins': 0, 'losses': 0})
+        # Thống kê UCT theo từng thế cờ: hash_key -> (số quân, {nước đi: count/wins/losses}).
+        # Cây sâu tree_depth tầng dưới mỗi thế cờ ứng viên, nên sau nước của mình và nước của đối thủ, các ứng viên
+        # của gốc mới (sâu hơn 2 tầng) đã có sẵn thống kê. Bỏ các thế cờ ít quân hơn gốc (không thể gặp lại), new_game() để xoá
+        self.stats = {}
+        self.last_stats = None      # SearchStats của nước đi gần nhất
         
     def set_color(self, color: int):
         self.color = color
+
+    def new_game(self):
+        self.stats.clear()
+
+    def node_stats(self, game_state: ConnectFourBoard):
+        """Thống kê UCT của các nước đi từ 'game_state'."""
+        entry = self.stats.get(game_state.hash_key)
+        if entry is None :
+            entry = self.stats.setdefault(game_state.hash_key, (sum(game_state.heights),
+                                          defaultdict(lambda: {'count': 0, 'wins': 0, 'losses': 0})))
+        return entry[1]
+
+    def age_stats(self, game: ConnectFourBoard):
+        """Bỏ thống kê của các thế cờ không còn gặp lại được từ 'game'."""
+        stones = sum(game.heights)
+        for key in [key for key, (count, _) in self.stats.items() if count <= stones] :
+            del self.stats[key]
     
     def get_move(self, game: ConnectFourBoard):
         start_time = time.time()
-        self.stats.clear()  # Reset stats trước mỗi lượt
+        self.last_stats = SearchStats(self.name)
+        self.age_stats(game)
         best_move = None
         best_value = -math.inf if self.color == RED else math.inf
         
         available_moves = self.order_moves_by_heuristic(game)
-        print(f"Available moves ordered: {available_moves}")  # Debug
+        if self.verbose:
+            print(f"Available moves ordered: {available_moves}")  # Debug
         
         for move in available_moves:
             if time.time() - start_time > self.max_time * 0.9:
                 break
                 
-            temp_game = deepcopy(game)
-            temp_game.drop_piece(move)
+            temp_game = game.copy()
+            temp_game.play(move)
+
+            # Thắng ngay: không cần rollout trên 1 ván đã kết thúc
+            if temp_game.last_move_won():
+                best_move = move
+                best_value = math.inf if self.color == RED else -math.inf
+                break
             
             move_value = self.parallel_mcts(temp_game)
-            print(f"Move {move} value: {move_value}")  # Debug
+            if self.verbose:
+                print(f"Move {move} value: {move_value}")  # Debug
             
             # Sửa lại logic so sánh CHÍNH XÁC
             if (self.color == RED and move_value > best_value) or \
@@ -324,18 +87,21 @@ class minimaxAndMcts:
             (best_move is None):
                 best_value = move_value
                 best_move = move
-                print(f"New best move: {best_move} (value: {best_value})")  # Debug
+                if self.verbose:
+                    print(f"New best move: {best_move} (value: {best_value})")  # Debug
         
         # Đảm bảo luôn có nước đi hợp lệ
         if best_move is None and available_moves:
             best_move = available_moves[0]
-        
+
+        self.last_stats.lap('rollout')
+        self.last_stats.finish('rollout')
         return best_move, best_value
     
     def calculate_depth(self, game:ConnectFourBoard, start_time: time):
         """lấy độ sâu dựa vào thời điểm, càng về sau tính càng lớn"""
         remaining_time = self.max_time - (time.time() - start_time)
-        remaining_moves = game.columns - len(game.get_available_columns())
+        remaining_moves = game.rows * game.columns - sum(game.heights)      # số ô trống còn lại
         depth = 0
         if remaining_moves < 5:  # Endgame
             depth = 7
@@ -350,6 +116,9 @@ class minimaxAndMcts:
             depth += 1
         elif time_per_move < 0.2:  # Ít thời gian thì giảm depth
             depth = max(2, depth - 1)
+
+        # Không cần tìm sâu hơn số ô còn trống
+        return min(depth, remaining_moves)
     
     def order_moves_by_heuristic(self, game: ConnectFourBoard):
         """Lấy danh sách các nước đi, ưu tiên cột trung tâm"""
@@ -359,7 +128,7 @@ class minimaxAndMcts:
     
     def parallel_mcts(self, game_state):
         start_time = time.time()
-        local_stats = self.stats
+        local_stats = self.node_stats(game_state)
         
         with ThreadPoolExecutor() as executor:
             futures = []
@@ -368,22 +137,23 @@ class minimaxAndMcts:
                     break
                 futures.append(executor.submit(
                     self.run_single_simulation, 
-                    deepcopy(game_state))
+                    game_state.copy())          # mỗi thread một bản sao, rollout chạy tại chỗ trên bản sao đó
                 )
             
+            self.last_stats.rollouts += len(futures)
+            self.last_stats.nodes += len(futures)
             for future in as_completed(futures):
-                move, result = future.result()
-                if move is not None:
-                    local_stats[move]['count'] += 1
-                    if result == game_state.turn:
-                        local_stats[move]['wins'] += 1
+                path, result = future.result()
+                # Cập nhật ở thread chính, cho mọi thế cờ trên đường đi (thắng/thua theo bên tới lượt ở thế cờ đó)
+                for key, stones, turn, move in path:
+                    node = self.stats.get(key)
+                    if node is None:
+                        node = self.stats.setdefault(key, (stones, defaultdict(lambda: {'count': 0, 'wins': 0, 'losses': 0})))
+                    node[1][move]['count'] += 1
+                    if result == turn:
+                        node[1][move]['wins'] += 1
                     elif result != IDLE:
-                        local_stats[move]['losses'] += 1
-        
-        # Merge local stats vào global stats (atomic update)
-        for move in local_stats:
-            for key in ['count', 'wins', 'losses']:
-                self.stats[move][key] += local_stats[move][key]
+                        node[1][move]['losses'] += 1
         
         # Tính toán giá trị trung bình CHÍNH XÁC
         move_values = []
@@ -395,11 +165,21 @@ class minimaxAndMcts:
         return sum(move_values)/len(move_values) if move_values else 0
     
     def run_single_simulation(self, game_state: ConnectFourBoard):
-        """Run one complete MCTS simulation"""
-        current_state = deepcopy(game_state)
-        move = self.select_move(current_state)
-        result = simulate(expand(current_state, move))
-        return move, result
+        """Run one complete MCTS simulation (in place on 'game_state', which is a private copy).
+        Đi xuống tối đa tree_depth tầng bằng UCT rồi chơi ngẫu nhiên, trả về (đường đi, kết quả);
+        đường đi là các (hash_key, số quân, bên tới lượt, nước đi) để cập nhật thống kê."""
+        path = []
+        for _ in range(self.tree_depth):
+            move = self.select_move(game_state)
+            if move is None:
+                break
+            path.append((game_state.hash_key, sum(game_state.heights), game_state.turn, move))
+            expand(game_state, move)
+            if game_state.last_move_won():
+                break
+        if not path:
+            return path, IDLE
+        return path, simulate(game_state)
     
     def select_move(self, game_state):
         """Chọn nước đi tốt nhất bằng UCT"""
@@ -407,25 +187,30 @@ class minimaxAndMcts:
         if not legal_moves:
             return None
         
-        print(f"Legal moves: {legal_moves}")  # Debug
-        print(f"Current stats: { {m: self.stats[m] for m in legal_moves} }")  # Debug
+        if self.verbose:
+            print(f"Legal moves: {legal_moves}")  # Debug
+        stats = self.node_stats(game_state)
+        if self.verbose:
+            print(f"Current stats: { {m: stats[m] for m in legal_moves} }")  # Debug
         
         # Đảm bảo ít nhất 1 move được thử nghiệm
-        unexplored = [m for m in legal_moves if self.stats[m]['count'] == 0]
+        unexplored = [m for m in legal_moves if stats[m]['count'] == 0]
         if unexplored:
             return random.choice(unexplored)
     
         # Chọn theo UCT
         best_move = max(legal_moves, key=lambda m: self.uct_value(game_state, m))
-        print(f"Selected move: {best_move}")  # Debug
+        if self.verbose:
+            print(f"Selected move: {best_move}")  # Debug
         return best_move
     
     def uct_value(self, game_state, move):
-        parent_visits = sum(self.stats[m]['count'] for m in game_state.get_available_columns())
+        stats = self.node_stats(game_state)
+        parent_visits = sum(stats[m]['count'] for m in game_state.get_available_columns())
         if parent_visits == 0:
             return float('inf')
         
-        move_stats = self.stats[move]
+        move_stats = stats[move]
         if move_stats['count'] == 0:
             return float('inf')
         
@@ -533,5 +318,4 @@ class minimaxAndMcts:
                 score += 100  # gần win
             elif line_length == 2 and empty_spaces >= 2:
                 score += 10   # bình thường
->>>>>>> 6525399065de2f1cef29c9f6c52b8cd7c65b562d
         return score
\ No newline at end of file
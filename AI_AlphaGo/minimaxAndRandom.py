@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from Simulation.Board import ConnectFourBoard
 from AI_AlphaGo.minimaxVsABPrunning import MinimaxAI, DEFAULT_WEIGHT
 from Constant import RED, YELLOW, IDLE 
+from AI_AlphaGo.search_stats import SearchStats
 
 class MinimaxAndRandom :
     def __init__ (self, random_percent_start=0.5, random_percent_end=0.1, depth=5, weight=DEFAULT_WEIGHT, eor=0.8) :
@@ -26,23 +27,35 @@ class MinimaxAndRandom :
         self.stat = {'Random': 0,
                      'Minimax': 0}
 
+        # Dùng chung 1 MinimaxAI cho cả ván để giữ TT, killer/history giữa các nước đi
+        self.minimax = MinimaxAI(weight=self.weight, depth=self.depth)
+        self.random = Random()
+        self.last_stats = None      # SearchStats của nước đi gần nhất (của MinimaxAI, hoặc 'random')
+
     def set_color(self, color) :
         self.color = color
+        self.minimax.set_color(color)
+        self.random.set_color(color)
+
+    def new_game(self) :
+        self.minimax.new_game()
 
     def get_move(self, game:ConnectFourBoard) :
         empty_percent = np.sum(game.board == IDLE) / (game.rows * game.columns)
         p = self.rand_min + self.rand_range * empty_percent * self.eor
 
         if random.random() < p :
-            runner = Random()
+            runner = self.random
             self.stat['Random'] += 1
         else :
-            runner = MinimaxAI(weight=self.weight, depth=self.depth)
+            runner = self.minimax
             self.stat['Minimax'] += 1
 
         self.name = self.org_name + ':' + runner.name
-        runner.set_color(self.color)
-        return runner.get_move(game)
+        stats = SearchStats(runner.name)
+        result = runner.get_move(game)
+        self.last_stats = getattr(runner, 'last_stats', None) or stats.finish('random')
+        return result
 
 
 class Random :
@@ -6,6 +6,7 @@
 # import os
 # import numpy
 # import math
+import time
 # sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # from Simulation.Board import ConnectFourBoard
 # from Constant import RED, YELLOW, IDLE 
@@ -153,6 +154,9 @@ import random
 import numpy as np
 import numpy
 import math
+import time
+import threading
+import json
 
 
 import sys
@@ -161,23 +165,96 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from Simulation.Board import ConnectFourBoard
 from Constant import RED, YELLOW, IDLE 
-from AI_AlphaGo.think_three import Think_Three
+from AI_AlphaGo.transposition import TranspositionTable, EXACT, LOWER, UPPER, NO_MOVE
+from AI_AlphaGo.move_ordering import MoveOrdering
+from AI_AlphaGo.evaluation import WindowEvaluator, IncrementalEvaluator
+from AI_AlphaGo.lazy_smp import LazySMP
+from AI_AlphaGo.opening_book import book_move
+from AI_AlphaGo.solver import Solver, SolverTimeout
+from AI_AlphaGo.search_stats import SearchStats
 
 
 DEFAULT_WEIGHT = [0.4, 0.2, 0.4, 0.2, 0.03]
+TUNED_WEIGHT_PATH = 'DL/data/minimax_weight.json'        # Ghi bởi DL/tune_weights.py
+
+DECAY = 0.9                     # Điểm giảm dần theo độ sâu, thắng sớm tốt hơn thắng muộn
+NULL_WINDOW = 1e-9              # Độ rộng cửa sổ khi thử nước bằng null window (PVS)
+
+TIME_CHECK_INTERVAL = 256       # Số nút giữa 2 lần xem đồng hồ
+TIME_SAFETY = 0.9               # Chỉ dùng 90% timeout, phần còn lại cho việc trả kết quả
+
+ENDGAME_CELLS = 16              # Còn ít ô trống hơn hoặc bằng thì giải chính xác thay vì dùng heuristic
+ENDGAME_SHARE = 0.5             # Phần timeout dành cho giải tàn cuộc, hết giờ thì quay về search thường
+ENDGAME_TABLE_ENTRIES = 1 << 16 # TT của Solver giải tàn cuộc (~70 byte mỗi entry, ~4.5MB), đầy thì xoá hết
+
+class SearchTimeout(Exception) :
+    """Hết thời gian giữa chừng một vòng iterative deepening."""
+
+def load_weight(path: str = TUNED_WEIGHT_PATH):
+    """Bộ trọng số đã tune (file JSON có khoá 'weight'), dùng: MinimaxAI(weight=load_weight())."""
+    with open(path) as f :
+        weight = json.load(f)['weight']
+    if len(weight) != len(DEFAULT_WEIGHT) :
+        raise ValueError(f'{path}: expected {len(DEFAULT_WEIGHT)} weights, got {len(weight)}')
+    return [float(w) for w in weight]
 
 class MinimaxAI:
-    def __init__(self, color=RED, weight=DEFAULT_WEIGHT, depth=5, timeout=None):
+    def __init__(self, color=RED, weight=DEFAULT_WEIGHT, depth=5, timeout=None, tt_size=1 << 18, workers=1, book=None,
+                 endgame_cells=ENDGAME_CELLS, ponder=False):
         self.name = 'MinimaxAI'
         self.color = color
         self.depth = depth
 
+        # timeout=None: tìm cố định 'depth'. Có timeout: iterative deepening 1, 2, 3, ... tới khi hết giờ
+        self.timeout = timeout
+        self.deadline = None
+        self.nodes = 0
+        self.root_move = None
+        self.completed_depth = 0
+
+        # Các thế cờ trùng nhau (đi khác thứ tự) chỉ tìm 1 lần.
+        # TT, killer/history và PV được giữ qua các nước đi trong 1 ván (làm cũ theo số quân), new_game() để xoá
+        self.tt_size = tt_size
+        self.tt = TranspositionTable(tt_size)
+        self.ordering = None            # MoveOrdering, tạo khi biết số cột của bàn cờ
+        self.pv = {}                    # Principal variation của lần tìm trước: {hash_key của thế cờ: nước tốt nhất}
+        self.root_stones = None         # Số quân trên bàn ở gốc của lần tìm trước
+
+        # workers > 1: Lazy SMP, thêm (workers - 1) helper process dùng chung TT trong shared memory.
+        # Các process được tạo ở lần get_move đầu tiên, gọi close() để tắt chúng
+        self.workers = workers
+        self.helpers = None
+        self.stop_event = None          # multiprocessing.Event, helper dừng khi process chính đã tìm xong
+
+        self.book = book                # OpeningBook, tra trước khi tìm
+
+        # Tàn cuộc: giải chính xác bằng Solver (bitboard + TT riêng), endgame_cells=0 để tắt
+        self.endgame_cells = endgame_cells
+        self.endgame = None
+
+        # ponder=True: sau khi trả nước đi, đoán nước trả lời của đối thủ và tìm tiếp thế cờ đó trong 1 thread nền.
+        # Lần get_move sau dừng thread lại: đoán đúng thì tìm tiếp từ độ sâu đã xong, đoán sai thì vẫn giữ TT đã có
+        self.pondering = ponder
+        self.ponder_thread = None
+        self.ponder_game = None         # Thế cờ đang ponder (sau nước của mình và nước đoán của đối thủ)
+        self.ponder_result = None       # (completed_depth, best_move, scores) khi ponder tìm xong ít nhất 1 vòng
+        if ponder :
+            self.stop_event = threading.Event()
+
 
         self.weight = { 'allie': [weight[0], weight[1]], 
                         'enemy': [weight[2], weight[3]],
                        'center': weight[4]}
+        self.weight_values = list(weight)
+        self.evaluator = None           # WindowEvaluator, tạo khi biết kích thước bàn cờ
+        self.incremental = None         # IncrementalEvaluator, điểm lá trong search được cập nhật theo play/undo
+
+        self.last_stats = None          # SearchStats của nước đi gần nhất
     def set_color(self, color: int):
         """Set the color of the AI."""
+        # Điểm trong TT tính theo màu của AI, đổi màu thì không dùng lại được
+        if color != self.color :
+            self.new_game()
         self.color = color
         self.opponent_color = YELLOW if color == RED else RED
 
@@ -200,92 +277,382 @@ class MinimaxAI:
 
     def evaluate(self, game: ConnectFourBoard):
         """Evaluate the board state and return a score."""
-        score = 0
-        turn = self.color  # Current player (RED or YELLOW)
-        
-        # Evaluate center column
-        center = game.board[:, game.columns // 2]
-        score += (np.sum(center == self.color) - np.sum(center == -self.color)) * self.weight['center']  # More pieces in the center is better
-        
-        # Đánh giá theo chiều ngang 
-        for r in range(game.rows):
-            row_array = [int(i) for i in list(game.board[r, :])]
-            for c in range(game.columns - 3):
-                window = row_array[c:c + 4]
-                score += self.evaluate_window(window, turn)
-        
-        # Đánh giá theo chiều dọc
-        for c in range(game.columns):
-            col_array = [int(i) for i in list(game.board[:, c])]
-            for r in range(game.rows - 3):
-                window = col_array[r:r + 4]
-                score += self.evaluate_window(window, turn)
-        
-        # Đánh giá theo đường chéo (từ trái trên xuống phải dưới)
-        for r in range(game.rows - 3):
-            for c in range(game.columns - 3):
-                window = [game.board[r + i][c + i] for i in range(4)]
-                score += self.evaluate_window(window, turn)
-        
-        # Đánh giá theo đường chéo từ trái dưới lên phải trên
-        for r in range(3, game.rows):
-            for c in range(game.columns - 3):
-                window = [game.board[r - i][c + i] for i in range(4)]
-                score += self.evaluate_window(window, turn)
-        
-        return score
-
-    def minimax(self, game: ConnectFourBoard, depth: int, alpha: float, beta: float, maximizingPlayer: bool):
-        """Minimax algorithm with alpha-beta pruning to find the best move."""
-
-        if game.check_win(self.color)  :
-            return [1.0]
-        if game.check_win(-self.color) :
-            return [-1.0]
+        # Bảng điểm theo cửa sổ 4 ô được dựng 1 lần cho mỗi kích thước bàn cờ, xem AI_AlphaGo/evaluation.py
+        if self.evaluator is None or self.evaluator.shape != game.shape :
+            self.evaluator = WindowEvaluator(game.shape, self.weight_values)
+        return self.evaluator(game.board, self.color)
+
+    def play(self, game: ConnectFourBoard, col: int):
+        """game.play(col) kèm cập nhật điểm đánh giá."""
+        row = game.rows - 1 - game.heights[col]
+        color = game.turn
+        game.play(col)
+        self.incremental.play(row, col, color)
+
+    def undo(self, game: ConnectFourBoard):
+        game.undo()
+        self.incremental.undo()
+
+    def search(self, game: ConnectFourBoard, depth: int):
+        """Tìm từ gốc 'game' trên 1 bản sao riêng. Trả về (cột tốt nhất, điểm từng cột)."""
+
+        # Search works in place with play/undo, so it runs on one private copy of the board
+        board = game.copy()
+        if self.incremental is None or self.incremental.shape != game.shape :
+            self.incremental = IncrementalEvaluator(game.shape, self.weight_values, board.board)
+        else :
+            self.incremental.reset(board.board)
+        return self.search_root(board, depth)
+
+    def search_root(self, game: ConnectFourBoard, depth: int):
+        """Gốc của negamax: giữ điểm của từng cột (theo góc nhìn self.color) cho move_valuated.
+
+        Nước đầu tiên được tìm với cửa sổ đầy đủ, các nước sau chỉ có cận trên (điểm <= nước tốt nhất)
+        nếu không vượt qua được null window.
+        """
+        self.nodes += 1
+        key = game.hash_key
+        entry = self.tt.probe(key)
+        first_move = self.root_move if self.root_move is not None else (entry[3] if entry is not None else NO_MOVE)
+        valid_columns = self.ordering.order(game, 0, None if first_move == NO_MOVE else first_move)
+
+        scores = [-1.0] * game.columns
+        alpha, beta = -math.inf, math.inf
+        best_move = valid_columns[0]
+        for index, col in enumerate(valid_columns):
+            self.play(game, col)
+            scores[col] = self.search_child(game, depth, alpha, beta, 1, index == 0)
+            self.undo(game)
+
+            if scores[col] > alpha:
+                alpha = scores[col]
+                best_move = col
+
+        self.tt.store(key, depth, EXACT, alpha, best_move)
+        return best_move, scores
+
+    def search_child(self, game: ConnectFourBoard, depth: int, alpha: float, beta: float, ply: int, full_window: bool):
+        """Điểm của nước vừa đi (theo góc nhìn người vừa đi), tìm kiểu PVS.
+
+        Nước không phải đầu tiên được thử bằng null window quanh alpha, chỉ tìm lại với cửa sổ (value, beta)
+        khi nó tốt hơn alpha. Điểm con nhân DECAY nên cửa sổ truyền xuống được chia cho DECAY.
+        """
+        if full_window :
+            return -DECAY * self.negamax(game, depth - 1, -beta / DECAY, -alpha / DECAY, ply)
+
+        value = -DECAY * self.negamax(game, depth - 1, -(alpha + NULL_WINDOW) / DECAY, -alpha / DECAY, ply)
+        if alpha < value < beta :
+            value = -DECAY * self.negamax(game, depth - 1, -beta / DECAY, -value / DECAY, ply)
+        return value
+
+    def negamax(self, game: ConnectFourBoard, depth: int, alpha: float, beta: float, ply: int):
+        """Negamax alpha-beta (fail-soft): điểm của thế cờ theo góc nhìn bên đang tới lượt."""
+
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and self.should_stop() :
+            raise SearchTimeout()
+
+        # Only the move that led here can have ended the game, so only its lines are checked
+        if game.last_move_won() :
+            return -1.0
         if game.is_full() :
-            return [0.0]
+            return 0.0
         if depth == 0: 
-            return [self.evaluate(game)]
-        
-        valid_columns = game.get_available_columns()
-
-        if maximizingPlayer:  # RED player
-            scores = [-1.0] * game.columns
-            for col in valid_columns:
-
-                # Backup current state
-                temp_game = game.copy()
-
-                # Drop piece and recurse
-                if temp_game.drop_piece(col):  # Only drop if the column is not full
-                    scores[col] = min(self.minimax(temp_game, depth - 1, alpha, beta, False)) * 0.9
-                    
-                    # Pruning
-                    alpha = max(alpha, scores[col])
-                    if alpha >= beta:
-                        break 
-            return scores
-
-        else:  # YELLOW player
-            scores = [1.0] * game.columns
-            for col in valid_columns:
-                # Backup current state
-                temp_game = game.copy()
-
-                # Drop piece and recurse
-                if temp_game.drop_piece(col):
-                    scores[col] = max(self.minimax(temp_game, depth - 1, alpha, beta, True)) * 0.9
-                    # Pruning
-                    beta = min(beta, scores[col])
-                    if alpha >= beta:
-                        break 
-            return scores
+            value = self.incremental.score(self.color)
+            return value if game.turn == self.color else -value
+
+        # Tra transposition table trước khi mở các nút con
+        key = game.hash_key
+        alpha_origin, beta_origin = alpha, beta
+        entry = self.tt.probe(key)
+        tt_move = NO_MOVE
+        if entry is not None :
+            tt_depth, tt_flag, tt_score, tt_move = entry
+            if tt_depth >= depth :
+                if tt_flag == EXACT :
+                    return tt_score
+                if tt_flag == LOWER :
+                    alpha = max(alpha, tt_score)
+                elif tt_flag == UPPER :
+                    beta = min(beta, tt_score)
+                if alpha >= beta :
+                    return tt_score
+
+        valid_columns = self.ordering.order(game, ply, None if tt_move == NO_MOVE else tt_move)
+
+        best, best_move = -math.inf, valid_columns[0]
+        for index, col in enumerate(valid_columns):
+            # Make move, recurse, then unmake it (no board copy per node)
+            self.play(game, col)
+            value = self.search_child(game, depth, alpha, beta, ply + 1, index == 0)
+            self.undo(game)
+
+            if value > best :
+                best, best_move = value, col
+            alpha = max(alpha, value)
+
+            # Pruning
+            if alpha >= beta:
+                self.ordering.record_cutoff(game.turn, ply, col, depth, index)
+                break 
+
+        if best <= alpha_origin :
+            flag = UPPER
+        elif best >= beta_origin :
+            flag = LOWER
+        else :
+            flag = EXACT
+        self.tt.store(key, depth, flag, best, best_move)
+        return best
+
+    def should_stop(self):
+        if self.deadline is not None and time.time() > self.deadline :
+            return True
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def prepare(self, game: ConnectFourBoard):
+        """Chuẩn bị search cho 1 nước đi: giữ TT, killer/history và PV của các nước trước, chỉ làm cũ chúng
+        theo số quân đã đi thêm. Gốc có ít quân hơn lần trước (ván mới, đi lại) thì xoá hết."""
+        stones = sum(game.heights)
+        if self.root_stones is not None and stones < self.root_stones :
+            self.new_game()
+
+        self.nodes = 0
+        self.tt.new_search(stones)
+        if self.ordering is None or self.ordering.columns != game.columns :
+            self.ordering = MoveOrdering(game.columns)
+        elif self.root_stones is not None and stones > self.root_stones :
+            self.ordering.age(stones - self.root_stones)
+        else :
+            self.ordering.reset_counters()
+        self.root_stones = stones
+
+        # Gốc nằm trên PV cũ thì thử nước của PV trước
+        self.root_move = self.pv.get(game.hash_key)
+
+    def new_game(self):
+        """Xoá TT, killer/history và PV, gọi giữa 2 ván (MatchMaker.play_game)."""
+        self.stop_pondering()
+        if self.tt.owner :
+            self.tt.clear()
+        if self.ordering is not None :
+            self.ordering.clear()
+        self.pv = {}
+        self.root_stones = None
+        if self.endgame is not None :
+            self.endgame.clear()
+
+    def principal_variation(self, game: ConnectFourBoard, length: int):
+        """Dãy nước tốt nhất từ 'game' (bắt đầu bằng root_move, tiếp theo lấy từ TT), dạng {hash_key: nước đi}."""
+        board = game.copy()
+        pv = {}
+        move = self.root_move
+        while move is not None and move != NO_MOVE and len(pv) < length and board.can_play(move) :
+            pv[board.hash_key] = move
+            board.play(move)
+            if board.last_move_won() or board.is_full() :
+                break
+            entry = self.tt.probe(board.hash_key)
+            move = entry[3] if entry is not None else None
+        return pv
 
     def get_move(self, game: ConnectFourBoard):
-        if (np.random.randint(2) % 2 ==0):
-            return self.think_instance.get_move(game)
-
-
         """Get the best move for the AI using Minimax."""
-        evaluated = self.minimax(game, self.depth, -math.inf, math.inf, True)
-        return evaluated.index(max(evaluated)), evaluated
+        self.last_stats = SearchStats(self.name)
+        pondered = self.stop_pondering()
+        self.last_stats.lap('ponder')
+
+        result = self.find_move(game, pondered)
+        if self.pondering :
+            self.start_pondering(game, result[0])
+        return result
+
+    def find_move(self, game: ConnectFourBoard, pondered: tuple = (None, None)):
+        """Chọn nước đi cho 'game'. pondered: (thế cờ, kết quả) của lần ponder vừa dừng, xem stop_pondering()."""
+        stats = self.last_stats
+        hit = book_move(self.book, game)
+        stats.lap('book')
+        if hit is not None :
+            stats.finish('book')
+            return hit
+
+        # Đoán đúng nước của đối thủ thì dùng lại kết quả ponder, đoán sai thì vẫn còn TT ponder đã làm nóng
+        ponder_game, ponder_result = pondered
+        # current_mask là quân của bên tới lượt, nên phải so cả bên tới lượt mới chắc là cùng thế cờ
+        ponder_hit = ponder_game is not None and ponder_game.turn == game.turn \
+                     and ponder_game.current_mask == game.current_mask and ponder_game.occupied_mask == game.occupied_mask
+        if ponder_game is not None :
+            stats.ponder = 'hit' if ponder_hit else 'miss'
+        if not ponder_hit :
+            ponder_result = None
+        self.prepare(game)
+
+        start_time = time.time()
+        deadline = None if self.timeout is None else start_time + self.timeout * TIME_SAFETY
+
+        if game.rows * game.columns - sum(game.heights) <= self.endgame_cells :
+            solved = self.solve_endgame(game, None if self.timeout is None else start_time + self.timeout * ENDGAME_SHARE)
+            stats.lap('endgame')
+            if solved is not None :
+                stats.nodes, stats.depth = self.nodes, self.completed_depth
+                stats.finish('endgame')
+                return solved
+
+        if self.workers > 1 :
+            if self.helpers is None :
+                self.tt = TranspositionTable.create_shared(self.tt_size)
+                self.helpers = LazySMP(self.workers - 1, self.tt, self.weight_values)
+            self.helpers.start(game, self.color, deadline)
+
+        tt_probes, tt_hits = self.tt.probes, self.tt.hits
+        source = 'search'
+        try :
+            if ponder_result is not None and deadline is None and ponder_result[0] >= self.depth :
+                # Ponder đã tìm đủ sâu
+                self.completed_depth, self.root_move, evaluated = ponder_result
+                source = 'ponder'
+            elif deadline is None :
+                self.deadline = None
+                self.root_move, evaluated = self.search(game, self.depth)
+                self.completed_depth = self.depth
+            elif ponder_result is not None :
+                # Tìm tiếp từ độ sâu ponder đã xong, hết giờ trước khi xong thêm vòng nào thì dùng kết quả ponder
+                ponder_depth, self.root_move, evaluated = ponder_result
+                best_move, scores = self.iterative_deepening(game, deadline, start_depth=ponder_depth + 1, finish_first=False)
+                if scores is None :
+                    self.completed_depth = ponder_depth
+                else :
+                    self.root_move, evaluated = best_move, scores
+            else :
+                self.root_move, evaluated = self.iterative_deepening(game, deadline)
+        finally :
+            reports = self.helpers.finish() if self.workers > 1 else []
+
+        # Gộp kết quả: lấy vòng tìm sâu nhất đã xong, hoà thì ưu tiên process chính
+        for completed_depth, best_move, scores, nodes in reports :
+            self.nodes += nodes
+            if completed_depth > self.completed_depth :
+                self.completed_depth, self.root_move, evaluated = completed_depth, best_move, scores
+
+        stats.lap('search')
+        stats.nodes, stats.depth = self.nodes, self.completed_depth
+        stats.searched, stats.cutoffs, stats.first_cutoffs = self.ordering.searched, self.ordering.cutoffs, self.ordering.first_cutoffs
+        stats.tt_probes, stats.tt_hits = self.tt.probes - tt_probes, self.tt.hits - tt_hits
+        stats.finish(source)
+
+        self.pv = self.principal_variation(game, max(self.completed_depth, 1))
+        return self.root_move, evaluated
+
+    def start_pondering(self, game: ConnectFourBoard, move: int):
+        """Đi 'move' và nước trả lời có khả năng nhất của đối thủ (nước tốt nhất trong TT), rồi tìm thế cờ đó
+        trong 1 thread nền cho tới lần get_move sau."""
+        board = game.copy()
+        board.play(move)
+        if board.last_move_won() or board.is_full() :
+            return
+
+        entry = self.tt.probe(board.hash_key)
+        if board.hash_key in self.pv :
+            reply = self.pv[board.hash_key]
+        elif entry is not None and entry[3] != NO_MOVE and board.can_play(entry[3]) :
+            reply = entry[3]
+        else :
+            reply = next(col for col in board.column_order if board.can_play(col))
+        board.play(reply)
+
+        # Tàn cuộc được Solver giải (có TT riêng), không cần ponder
+        if board.last_move_won() or board.rows * board.columns - sum(board.heights) <= self.endgame_cells :
+            return
+
+        self.ponder_game = board
+        self.ponder_result = None
+        self.stop_event.clear()
+        self.ponder_thread = threading.Thread(target=self.ponder, args=(board,), daemon=True)
+        self.ponder_thread.start()
+
+    def ponder(self, game: ConnectFourBoard):
+        """Thân của thread ponder: iterative deepening không giới hạn thời gian, dừng bằng stop_event."""
+        self.prepare(game)
+        best_move, scores = self.iterative_deepening(game, None, finish_first=False)
+        if scores is not None :
+            self.ponder_result = (self.completed_depth, best_move, scores)
+
+    def stop_pondering(self):
+        """Dừng thread ponder (nếu có), trả về (thế cờ đã ponder, kết quả) hoặc (None, None)."""
+        if self.ponder_thread is None :
+            return None, None
+        self.stop_event.set()
+        self.ponder_thread.join()
+        self.stop_event.clear()
+        self.ponder_thread = None
+        return self.ponder_game, self.ponder_result
+
+    def iterative_deepening(self, game: ConnectFourBoard, deadline: float, start_depth: int = 1, finish_first: bool = True):
+        """Tìm độ sâu start_depth, start_depth + 1, ... tới deadline (hoặc tới khi bị dừng),
+        trả về kết quả của vòng cuối cùng tìm xong."""
+
+        empty_cells = game.rows * game.columns - sum(game.heights)
+        evaluated = None
+        self.completed_depth = 0
+
+        for depth in range(min(start_depth, empty_cells), empty_cells + 1) :
+            # Vòng đầu luôn tìm xong để chắc chắn có nước đi
+            self.deadline = None if (finish_first and evaluated is None) else deadline
+            try :
+                best_move, scores = self.search(game, depth)
+            except SearchTimeout :
+                break
+
+            evaluated = scores
+            self.completed_depth = depth
+            self.root_move = best_move
+            if deadline is not None and time.time() > deadline :
+                break
+
+        self.deadline = None
+        return self.root_move, evaluated
+
+    def solve_endgame(self, game: ConnectFourBoard, deadline: float = None):
+        """Giải chính xác tàn cuộc, trả về (cột, điểm từng cột) theo thang điểm của search, None nếu không kịp."""
+
+        if self.endgame is None :
+            self.endgame = Solver(color=self.color, max_entries=ENDGAME_TABLE_ENTRIES)
+        try :
+            exact = self.endgame.analyze(game, deadline)
+        except SolverTimeout :
+            return None
+        finally :
+            self.nodes += self.endgame.nodes
+
+        moves = sum(game.heights)
+        evaluated = [-1.0] * game.columns
+        for col, score in enumerate(exact) :
+            if score is not None :
+                evaluated[col] = self.exact_value(score, game.rows * game.columns, moves)
+
+        self.completed_depth = game.rows * game.columns - moves
+        self.root_move = max((col for col in game.column_order if exact[col] is not None), key=lambda col: exact[col])
+        return self.root_move, evaluated
+
+    @staticmethod
+    def exact_value(score: int, cells: int, moves: int):
+        """Đổi điểm của Solver sang thang điểm của search: thắng/thua ở nước thứ d tính từ gốc là +-DECAY^d."""
+        if score == 0 :
+            return 0.0
+
+        # score = (cells + 1 - số quân trước nước thắng) // 2, phép chia làm tròn nên chọn lại theo tính chẵn lẻ:
+        # thắng thì nước quyết định là nước lẻ tính từ gốc, thua thì là nước chẵn
+        plies = cells + 2 - 2 * abs(score) - moves
+        if (plies % 2 == 1) != (score > 0) :
+            plies -= 1
+        return DECAY ** plies if score > 0 else -DECAY ** plies
+
+    def close(self):
+        """Dừng ponder, tắt các helper process và giải phóng TT dùng chung (chỉ cần khi workers > 1)."""
+        self.stop_pondering()
+        if self.helpers is None :
+            return
+        self.helpers.close()
+        self.helpers = None
+        self.tt.close(unlink=True)
+        self.tt = TranspositionTable(self.tt_size)
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Simulation.Board import ConnectFourBoard
+from Constant import RED, YELLOW
+
+
+class MoveOrdering :
+    ###
+    #   Sắp xếp nước đi cho alpha-beta, theo thứ tự ưu tiên:
+    #       1. Nước tốt nhất lấy từ transposition table (hoặc của vòng iterative deepening trước)
+    #       2. Killer moves: 2 nước gần nhất gây cắt tỉa ở cùng ply
+    #       3. Còn lại theo history table (cộng depth^2 mỗi lần gây cắt tỉa), hoà thì ưu tiên cột giữa
+    #
+    #   Killer và history được giữ qua các nước đi trong 1 ván (xem age), clear() khi sang ván mới.
+    #
+    #   Thống kê (mỗi nước đi):
+    #       searched        :   số nút được mở (có duyệt nút con)
+    #       cutoffs         :   số nút bị cắt tỉa
+    #       first_cutoffs   :   số nút bị cắt tỉa ngay ở nước đầu tiên
+    ###
+
+    KILLERS_PER_PLY = 2
+
+    def __init__(self, columns:int, max_ply:int =64) :
+        self.columns = columns
+        self.max_ply = max_ply
+        self.clear()
+
+    def clear(self) :
+        self.killers = [[] for _ in range(self.max_ply)]
+        self.history = {color: [0] * self.columns for color in (RED, YELLOW)}
+        self.reset_counters()
+
+    def reset_counters(self) :
+        self.searched = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+
+    def age(self, plies:int) :
+        """Giữ lại cho lần tìm sau khi gốc đã đi thêm 'plies' nước: killer dịch theo ply, history giảm một nửa."""
+
+        plies = min(max(plies, 0), self.max_ply)
+        self.killers = self.killers[plies:] + [[] for _ in range(plies)]
+        for color in self.history :
+            self.history[color] = [value >> 1 for value in self.history[color]]
+        self.reset_counters()
+
+    def order(self, game:ConnectFourBoard, ply:int, first_move:int =None) :
+        """Các cột hợp lệ của 'game' theo thứ tự nên thử."""
+
+        self.searched += 1
+
+        # get_available_columns đã theo thứ tự từ giữa ra ngoài, sort ổn định nên hoà vẫn giữ thứ tự đó
+        history = self.history[game.turn]
+        columns = sorted(game.get_available_columns(), key=lambda col: -history[col])
+
+        front = [first_move] if first_move is not None else []
+        if ply < self.max_ply :
+            front += self.killers[ply]
+
+        for col in reversed(front) :
+            if col in columns :
+                columns.remove(col)
+                columns.insert(0, col)
+        return columns
+
+    def record_cutoff(self, turn:int, ply:int, col:int, depth:int, move_index:int) :
+        """Nước 'col' (thứ 'move_index' được thử) gây cắt tỉa ở độ sâu còn lại 'depth'."""
+
+        self.cutoffs += 1
+        if move_index == 0 :
+            self.first_cutoffs += 1
+
+        self.history[turn][col] += depth * depth
+
+        if ply < self.max_ply :
+            killers = self.killers[ply]
+            if col in killers :
+                killers.remove(col)
+            killers.insert(0, col)
+            del killers[self.KILLERS_PER_PLY:]
+
+    def cutoff_rate(self) :
+        """Tỉ lệ nút bị cắt tỉa trên số nút được mở."""
+        return self.cutoffs / self.searched if self.searched else 0.0
+
+    def first_cutoff_rate(self) :
+        """Trong các lần cắt tỉa, tỉ lệ cắt ngay ở nước đầu tiên (càng gần 1 thì thứ tự càng tốt)."""
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
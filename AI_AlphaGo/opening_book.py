@@ -0,0 +1,158 @@
+import argparse
+import time
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Simulation.Board import ConnectFourBoard
+from Simulation.Dataset import memmap_npz_member
+
+
+DEFAULT_BOOK_PATH = 'DL/data/opening_book.npz'
+
+
+class OpeningBook :
+    ###
+    #   Opening book đã tính sẵn, đọc bằng memory-map và tra bằng tìm kiếm nhị phân (np.searchsorted).
+    #   File .npz (không nén) gồm:
+    #       keys        :   (N,) uint64, canonical_key() của thế cờ, đã sắp xếp tăng dần
+    #       moves       :   (N,) int8, nước tốt nhất theo hướng của thế cờ canonical
+    #       scores      :   (N,) float32, điểm của nước đó (theo góc nhìn bên tới lượt), thang điểm tuỳ theo 'exact'
+    #       exact       :   (N,) bool, True: điểm được Solver chứng minh, theo thang của Solver (số nguyên, xem solver.py)
+    #                                  False: điểm heuristic của MinimaxAI (trong khoảng [-1, 1])
+    #                       2 loại điểm không so sánh được với nhau, lookup() trả về cả cờ này
+    #       shape       :   (rows, columns)
+    #
+    #   Thế cờ và ảnh đối xứng trái-phải dùng chung 1 entry: nếu thế cờ đang tra là ảnh đối xứng của
+    #   thế cờ canonical thì nước đi được lật lại (columns - 1 - move).
+    ###
+
+    def __init__(self, path:str =DEFAULT_BOOK_PATH) :
+        self.path = path
+        with np.load(path) as archive :
+            self.shape = tuple(int(x) for x in archive['shape'])
+
+        self.keys = memmap_npz_member(path, 'keys')
+        self.moves = memmap_npz_member(path, 'moves')
+        self.scores = memmap_npz_member(path, 'scores')
+        self.exact = memmap_npz_member(path, 'exact')
+
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) :
+        return len(self.keys)
+
+    def lookup(self, game:ConnectFourBoard, exact_only:bool =False) :
+        """(cột, điểm, exact) của 'game' nếu có trong book, ngược lại None. exact_only: bỏ qua các entry heuristic."""
+
+        self.lookups += 1
+        if tuple(game.shape) != self.shape :
+            return None
+
+        key = game.canonical_key()
+        index = int(np.searchsorted(self.keys, np.uint64(key)))
+        if index >= len(self.keys) or int(self.keys[index]) != key :
+            return None
+        if exact_only and not self.exact[index] :
+            return None
+
+        self.hits += 1
+        move = int(self.moves[index])
+        if key != game.hash_key :
+            move = game.columns - 1 - move
+        return move, float(self.scores[index]), bool(self.exact[index])
+
+
+def book_move(book:OpeningBook, game:ConnectFourBoard) :
+    """(cột, đánh giá) theo kiểu get_move nếu 'game' có trong book, ngược lại None.
+    Đánh giá theo mặc định của MatchMaker: cột được chọn bằng 1, còn lại bằng 0."""
+
+    if book is None :
+        return None
+    hit = book.lookup(game)
+    if hit is None :
+        return None
+
+    evaluated = [0.0] * game.columns
+    evaluated[hit[0]] = 1.0
+    return hit[0], evaluated
+
+def book_positions(shape:tuple[int, int], max_ply:int) :
+    """Các thế cờ (không trùng, tính cả đối xứng) có từ 0 tới max_ply quân và chưa kết thúc."""
+
+    frontier = [ConnectFourBoard(shape)]
+    seen = {frontier[0].canonical_key()}
+    positions = list(frontier)
+
+    for ply in range(max_ply) :
+        next_frontier = []
+        for game in frontier :
+            for col in game.get_available_columns() :
+                child = game.copy()
+                child.play(col)
+                key = child.canonical_key()
+                if key in seen or child.last_move_won() or child.is_full() :
+                    continue
+                seen.add(key)
+                next_frontier.append(child)
+        positions += next_frontier
+        frontier = next_frontier
+
+    return positions
+
+def make_engine(name:str, timeout:float) :
+    """Engine mạnh nhất hiện có: Solver (dự phòng bằng MinimaxAI khi không giải kịp), hoặc chỉ MinimaxAI."""
+
+    if name == 'solver' :
+        from AI_AlphaGo.solver import Solver
+        return Solver(timeout=timeout)
+
+    from AI_AlphaGo.minimaxVsABPrunning import MinimaxAI
+    return MinimaxAI(timeout=timeout)
+
+def build_book(output_path:str, shape:tuple[int, int] =(6, 7), max_ply:int =4, engine:str ='solver', timeout:float =5.0) :
+    """Tính nước tốt nhất cho mọi thế cờ tới 'max_ply' quân rồi ghi ra 'output_path'."""
+
+    positions = book_positions(shape, max_ply)
+    searcher = make_engine(engine, timeout)
+    entries = {}
+
+    start_time = time.time()
+    for index, game in enumerate(positions) :
+        searcher.set_color(game.turn)
+        col, evaluated = searcher.get_move(game)
+        score = float(evaluated[col])
+        exact = bool(getattr(searcher, 'solved', False))
+
+        # Nước đi được lưu theo hướng của thế cờ canonical
+        key = game.canonical_key()
+        if key != game.hash_key :
+            col = game.columns - 1 - col
+        entries[key] = (col, score, exact)
+
+        print(f'\r{index + 1}/{len(positions)} positions, {time.time() - start_time:.0f}s', end='', flush=True)
+    print()
+
+    keys = np.array(sorted(entries), dtype=np.uint64)
+    moves = np.array([entries[int(key)][0] for key in keys], dtype=np.int8)
+    scores = np.array([entries[int(key)][1] for key in keys], dtype=np.float32)
+    exact = np.array([entries[int(key)][2] for key in keys], dtype=bool)
+    np.savez(output_path, keys=keys, moves=moves, scores=scores, exact=exact, shape=np.array(shape, dtype=np.int64))
+    return len(keys)
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Build an opening book')
+    parser.add_argument('--ply', type=int, default=4, help='Book covers positions with up to this many stones (default: 4)')
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--columns', type=int, default=7)
+    parser.add_argument('--engine', choices=['solver', 'minimax'], default='solver')
+    parser.add_argument('--timeout', type=float, default=5.0, help='Search time per position in seconds (default: 5)')
+    parser.add_argument('--output', default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args()
+
+    count = build_book(args.output, (args.rows, args.columns), args.ply, args.engine, args.timeout)
+    print(f'{count} positions written to {args.output}')
@@ -0,0 +1,108 @@
+import time
+
+
+class SearchStats :
+    ###
+    #   Thống kê của 1 nước đi, agent tìm kiếm gán vào self.last_stats mỗi lần get_move.
+    #       agent           :   tên agent
+    #       source          :   nước đi lấy từ đâu: 'book', 'search', 'endgame', 'rollout', 'fallback', 'rule', ...
+    #       nodes           :   số nút đã mở (MCTS: số rollout)
+    #       rollouts        :   số ván giả lập (chỉ agent kiểu MCTS)
+    #       depth           :   độ sâu tìm xong sâu nhất, None nếu agent không tìm theo độ sâu
+    #       searched        :   số nút có duyệt nút con   \
+    #       cutoffs         :   số nút bị cắt tỉa          > tỉ lệ cắt tỉa (beta-cutoff)
+    #       first_cutoffs   :   số nút cắt ngay nước đầu  /
+    #       tt_probes       :   số lần tra TT/cache, tt_hits: số lần tra thấy
+    #       ponder          :   None nếu không ponder, 'hit' nếu đoán đúng nước của đối thủ, 'miss' nếu sai
+    #       phases          :   dict tên giai đoạn -> số giây, đo bằng lap()
+    #       time            :   tổng thời gian của nước đi
+    ###
+
+    def __init__(self, agent:str) :
+        self.agent = agent
+        self.source = 'search'
+        self.nodes = 0
+        self.rollouts = 0
+        self.depth = None
+        self.searched = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.ponder = None
+        self.phases = {}
+        self.time = 0.0
+
+        self.start_time = time.time()
+        self.lap_time = self.start_time
+
+    def lap(self, phase:str) :
+        """Cộng thời gian từ lần lap() trước (hoặc từ lúc tạo) vào giai đoạn 'phase'."""
+        now = time.time()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.lap_time
+        self.lap_time = now
+
+    def finish(self, source:str =None) :
+        if source is not None :
+            self.source = source
+        self.time = time.time() - self.start_time
+        return self
+
+    def nps(self) :
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    def cutoff_rate(self) :
+        return self.cutoffs / self.searched if self.searched else 0.0
+
+    def first_cutoff_rate(self) :
+        """Trong các lần cắt tỉa, tỉ lệ cắt ngay ở nước đầu tiên (đo chất lượng sắp xếp nước đi)."""
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def tt_hit_rate(self) :
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def as_dict(self) :
+        return {'agent': self.agent, 'source': self.source,
+                'nodes': self.nodes, 'rollouts': self.rollouts, 'depth': self.depth,
+                'time': round(self.time, 6), 'nps': round(self.nps(), 1),
+                'searched': self.searched, 'cutoffs': self.cutoffs, 'first_cutoffs': self.first_cutoffs,
+                'cutoff_rate': round(self.cutoff_rate(), 4), 'first_cutoff_rate': round(self.first_cutoff_rate(), 4),
+                'tt_probes': self.tt_probes, 'tt_hits': self.tt_hits, 'tt_hit_rate': round(self.tt_hit_rate(), 4),
+                'ponder': self.ponder,
+                'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()}}
+
+    def __str__(self) :
+        text = f'{self.source}, {self.nodes} nodes, {self.nps():.0f} nps'
+        if self.depth is not None :
+            text += f', depth {self.depth}'
+        if self.searched :
+            text += f', cutoff {self.cutoff_rate():.0%}'
+        if self.tt_probes :
+            text += f', tt hit {self.tt_hit_rate():.0%}'
+        return text
+
+
+def summarize(moves:list[dict]) :
+    """Gộp các SearchStats.as_dict() của 1 người chơi trong 1 ván."""
+
+    nodes = sum(move['nodes'] for move in moves)
+    elapsed = sum(move['time'] for move in moves)
+    depths = [move['depth'] for move in moves if move['depth'] is not None]
+
+    sources, ponder, phases = {}, {}, {}
+    for move in moves :
+        sources[move['source']] = sources.get(move['source'], 0) + 1
+        if move['ponder'] is not None :
+            ponder[move['ponder']] = ponder.get(move['ponder'], 0) + 1
+        for name, seconds in move['phases'].items() :
+            phases[name] = round(phases.get(name, 0.0) + seconds, 6)
+
+    # Tỉ lệ được tính lại từ tổng số lần (không lấy trung bình các tỉ lệ của từng nước)
+    total = {name: sum(move[name] for move in moves) for name in ('searched', 'cutoffs', 'tt_probes', 'tt_hits')}
+    return {'moves': len(moves), 'nodes': nodes, 'rollouts': sum(move['rollouts'] for move in moves),
+            'time': round(elapsed, 6), 'nps': round(nodes / elapsed, 1) if elapsed > 0 else 0.0,
+            'max_depth': max(depths) if depths else None,
+            'mean_depth': round(sum(depths) / len(depths), 2) if depths else None,
+            'cutoff_rate': round(total['cutoffs'] / total['searched'], 4) if total['searched'] else 0.0,
+            'tt_hit_rate': round(total['tt_hits'] / total['tt_probes'], 4) if total['tt_probes'] else 0.0,
+            'sources': sources, 'ponder': ponder, 'phases': phases}
@@ -0,0 +1,263 @@
+import time
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Simulation.Board import ConnectFourBoard
+from Constant import RED
+from AI_AlphaGo.search_stats import SearchStats
+
+
+TIME_CHECK_INTERVAL = 1024      # Số nút giữa 2 lần xem đồng hồ
+SOLVE_SHARE = 0.7               # Phần timeout dành cho việc giải, phần còn lại cho nước đi heuristic dự phòng
+TIME_SAFETY = 0.9
+
+class SolverTimeout(Exception) :
+    """Hết thời gian trước khi chứng minh xong giá trị thế cờ."""
+
+
+class Solver :
+    ###
+    #   Agent chơi hoàn hảo: chứng minh giá trị lý thuyết của thế cờ (cách làm của Pascal Pons).
+    #
+    #   Thang điểm (theo góc nhìn bên tới lượt), với cells = rows * columns và moves = số quân đã có trên bàn:
+    #       > 0     :   thắng, điểm = (cells + 1 - số quân của bên thắng khi thắng) / 2, thắng càng sớm càng cao
+    #       = 0     :   hoà
+    #       < 0     :   thua, tương tự
+    #
+    #   Search chạy thẳng trên bitboard (current, mask) giống ConnectFourBoard, không đi qua play/undo:
+    #       - chỉ xét các nước không thua ngay, thắng ngay thì trả điểm luôn
+    #       - thứ tự nước đi theo số ô thắng tạo ra, hoà thì ưu tiên cột giữa
+    #       - transposition table (dict) lưu cận trên, key = current + mask, dùng lại giữa các nước đi
+    #       - iterative null-window (chặt nhị phân khoảng [min, max] bằng cửa sổ rộng 1)
+    #
+    #   get_move trả về (cột, điểm từng cột). Nếu không giải kịp trong timeout thì dùng MinimaxAI để chọn nước
+    #   (solved = False). book: OpeningBook, chỉ dùng các entry đã được chứng minh (exact), tra trước khi giải.
+    ###
+
+    def __init__(self, color=RED, timeout=5.0, book=None, weak=False, max_entries=1 << 20) :
+        self.name = 'Solver'
+        self.color = color
+        self.timeout = timeout
+        self.book = book
+        self.weak = weak                            # weak=True: chỉ phân biệt thắng / hoà / thua, nhanh hơn
+        self.max_entries = max_entries              # TT đầy thì xoá hết, ~70 byte mỗi entry
+
+        self.shape = None
+        self.table = {}
+        self.nodes = 0
+        self.deadline = None
+        self.solved = False
+        self.last_stats = None          # SearchStats của nước đi gần nhất
+        self.fallback = None            # MinimaxAI dự phòng, chỉ tạo khi giải không kịp lần đầu
+
+    def set_color(self, color:int) :
+        self.color = color
+        if self.fallback is not None :
+            self.fallback.set_color(color)
+
+    def new_game(self) :
+        """Giữa 2 ván: chỉ xoá trạng thái của MinimaxAI dự phòng. TT của Solver lưu cận của giá trị lý thuyết,
+        không phụ thuộc ván đấu hay màu quân nên được giữ lại."""
+        if self.fallback is not None :
+            self.fallback.new_game()
+
+    def clear(self) :
+        """Xoá TT của Solver (giải phóng bộ nhớ), ví dụ khi Solver giải tàn cuộc cho MinimaxAI sang ván mới."""
+        self.table.clear()
+
+    def get_fallback(self) :
+        """MinimaxAI dự phòng (có TT riêng), tạo lần đầu khi cần. Solver được MinimaxAI dùng để giải tàn cuộc
+        thì không bao giờ gọi tới, nên không tốn thêm 1 MinimaxAI."""
+
+        if self.fallback is None :
+            # Import tại chỗ: MinimaxAI cũng dùng Solver để giải tàn cuộc
+            from AI_AlphaGo.minimaxVsABPrunning import MinimaxAI
+            self.fallback = MinimaxAI(color=self.color)
+        return self.fallback
+
+    def _setup(self, shape:tuple[int, int]) :
+        """Các mask cố định theo kích thước bàn cờ (cùng layout với ConnectFourBoard)."""
+
+        if self.shape == shape :
+            return
+        self.shape = shape
+        self.rows, self.columns = shape
+        self.cells = self.rows * self.columns
+        self.min_score = -(self.cells // 2) + 3
+        self.max_score = (self.cells + 1) // 2 - 3
+
+        self.column_bits = self.rows + 1
+        self.bottom_mask = sum(1 << (c * self.column_bits) for c in range(self.columns))
+        self.board_mask = self.bottom_mask * ((1 << self.rows) - 1)
+        center = self.columns // 2
+        self.column_order = sorted(range(self.columns), key=lambda c: (abs(c - center), -c))
+        self.column_masks = [((1 << self.rows) - 1) << (c * self.column_bits) for c in range(self.columns)]
+        self.table = {}
+
+    def winning_cells(self, position:int, mask:int) :
+        """Các ô trống mà 'position' đặt quân vào thì thành 4 quân liên tiếp."""
+
+        result = (position << 1) & (position << 2) & (position << 3)
+        for shift in (self.column_bits, self.column_bits - 1, self.column_bits + 1) :
+            pairs = (position << shift) & (position << (2 * shift))
+            result |= pairs & (position << (3 * shift))
+            result |= pairs & (position >> shift)
+            pairs = (position >> shift) & (position >> (2 * shift))
+            result |= pairs & (position << shift)
+            result |= pairs & (position >> (3 * shift))
+        return result & (self.board_mask ^ mask)
+
+    def non_losing_moves(self, current:int, mask:int) :
+        """Bit của các nước đi không để đối thủ thắng ngay ở nước sau."""
+
+        possible = (mask + self.bottom_mask) & self.board_mask
+        opponent_win = self.winning_cells(current ^ mask, mask)
+        forced = possible & opponent_win
+        if forced :
+            if forced & (forced - 1) :
+                return 0                                        # đối thủ có 2 đường thắng, không chặn được
+            possible = forced
+        return possible & ~(opponent_win >> 1)                  # không đánh ngay dưới ô thắng của đối thủ
+
+    def negamax(self, current:int, mask:int, moves:int, alpha:int, beta:int) :
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % TIME_CHECK_INTERVAL == 0 and time.time() > self.deadline :
+            raise SolverTimeout()
+
+        possible = self.non_losing_moves(current, mask)
+        if possible == 0 :
+            return -((self.cells - moves) // 2)
+        if moves >= self.cells - 2 :
+            return 0
+
+        lower = -((self.cells - 2 - moves) // 2)
+        if alpha < lower :
+            alpha = lower
+            if alpha >= beta :
+                return alpha
+
+        upper = (self.cells - 1 - moves) // 2
+        key = current + mask
+        stored = self.table.get(key)
+        if stored is not None :
+            upper = stored
+        if beta > upper :
+            beta = upper
+            if alpha >= beta :
+                return beta
+
+        # Nước nào tạo ra nhiều ô thắng hơn thì thử trước
+        candidates = []
+        for col in self.column_order :
+            move = possible & self.column_masks[col]
+            if move :
+                candidates.append((self.winning_cells(current | move, mask).bit_count(), len(candidates), move))
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+
+        for _, _, move in candidates :
+            next_mask = mask | move
+            score = -self.negamax(current ^ mask, next_mask, moves + 1, -beta, -alpha)
+            if score >= beta :
+                return score
+            if score > alpha :
+                alpha = score
+
+        if len(self.table) >= self.max_entries :
+            self.table.clear()
+        self.table[key] = alpha
+        return alpha
+
+    def solve_position(self, current:int, mask:int, moves:int) :
+        """Điểm chính xác của thế cờ (bên tới lượt), bằng các lần tìm null window liên tiếp."""
+
+        if self.winning_cells(current, mask) & (mask + self.bottom_mask) & self.board_mask :
+            return (self.cells + 1 - moves) // 2
+
+        low, high = -((self.cells - moves) // 2), (self.cells + 1 - moves) // 2
+        if self.weak :
+            low, high = -1, 1
+        while low < high :
+            # Thử gần 0 trước (chia đôi về phía 0), vì đa số thế cờ có điểm nhỏ
+            middle = low + (high - low) // 2
+            if middle <= 0 and int(low / 2) < middle :
+                middle = int(low / 2)
+            elif middle >= 0 and int(high / 2) > middle :
+                middle = int(high / 2)
+            score = self.negamax(current, mask, moves, middle, middle + 1)
+            if score <= middle :
+                high = score
+            else :
+                low = score
+        return low
+
+    def solve(self, game:ConnectFourBoard) :
+        """Điểm chính xác của 'game' theo góc nhìn bên tới lượt (không giới hạn thời gian)."""
+
+        self._setup(game.shape)
+        self.deadline = None
+        return self.solve_position(game.current_mask, game.occupied_mask, sum(game.heights))
+
+    def analyze(self, game:ConnectFourBoard, deadline:float =None) :
+        """Điểm chính xác của từng cột (theo góc nhìn bên tới lượt), cột đã đầy là None."""
+
+        self._setup(game.shape)
+        self.deadline = deadline
+        self.nodes = 0
+        current, mask, moves = game.current_mask, game.occupied_mask, sum(game.heights)
+        winning = self.winning_cells(current, mask)
+
+        scores = [None] * self.columns
+        for col in self.column_order :
+            if not game.can_play(col) :
+                continue
+            move = (mask + self.bottom_mask) & self.column_masks[col]
+            if winning & move :
+                scores[col] = (self.cells + 1 - moves) // 2
+            else :
+                scores[col] = -self.solve_position(current ^ mask, mask | move, moves + 1)
+        return scores
+
+    def get_move(self, game:ConnectFourBoard) :
+        start_time = time.time()
+        stats = self.last_stats = SearchStats(self.name)
+        self.nodes = 0
+        self._setup(game.shape)
+
+        if self.book is not None :
+            hit = self.book.lookup(game, exact_only=True)
+            stats.lap('book')
+            if hit is not None :
+                col, score, _ = hit
+                self.solved = True
+                stats.finish('book')
+                evaluated = [float(self.min_score - 1)] * game.columns
+                evaluated[col] = float(score)
+                return col, evaluated
+
+        try :
+            scores = self.analyze(game, start_time + self.timeout * SOLVE_SHARE * TIME_SAFETY)
+        except SolverTimeout :
+            # Không chứng minh kịp: dùng nước heuristic với thời gian còn lại
+            stats.lap('solve')
+            self.solved = False
+            fallback = self.get_fallback()
+            fallback.timeout = max(self.timeout * TIME_SAFETY - (time.time() - start_time), 0.01)
+            result = fallback.get_move(game)
+
+            stats.lap('fallback')
+            searched = fallback.last_stats
+            stats.nodes, stats.depth = self.nodes + searched.nodes, searched.depth
+            stats.searched, stats.cutoffs, stats.first_cutoffs = searched.searched, searched.cutoffs, searched.first_cutoffs
+            stats.tt_probes, stats.tt_hits = searched.tt_probes, searched.tt_hits
+            stats.finish('fallback')
+            return result
+
+        stats.lap('solve')
+        stats.nodes, stats.depth = self.nodes, self.cells - sum(game.heights)
+        stats.finish('solve')
+        self.solved = True
+        evaluated = [float(score) if score is not None else float(self.min_score - 1) for score in scores]
+        best = max((col for col in self.column_order if scores[col] is not None), key=lambda col: scores[col])
+        return best, evaluated
@@ -1,4 +1,3 @@
-from copy import deepcopy
 import random
 import numpy as np
 
@@ -8,11 +7,13 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from Simulation.Board import ConnectFourBoard
 from Constant import RED, YELLOW, IDLE 
+from AI_AlphaGo.search_stats import SearchStats
 
 class Think_One :
     def __init__(self, color=RED, timeout=None):
         self.name = 'Think One'
         self.color = color
+        self.last_stats = None      # SearchStats của nước đi gần nhất, nodes = số nước đã thử
 
     def set_color(self, color:int) :
         self.color = color
@@ -22,6 +23,12 @@ class Think_One :
         return None
 
     def get_move(self, game:ConnectFourBoard):
+        self.last_stats = SearchStats(self.name)
+        result = self.choose_move(game)
+        self.last_stats.finish('rule')
+        return result
+
+    def choose_move(self, game:ConnectFourBoard):
         """Simple AI that checks for immediate winning moves.
         
         Args:
@@ -34,10 +41,15 @@ class Think_One :
             print('Board và ThinkOne đang bị lệch màu')
 
         # Try to win in one move
+        board = game.copy()
         for i in range(game.columns):
-            game_clone = deepcopy(game) 
-            if game_clone.drop_piece(i) and game_clone.check_win(self.color):
-                return i, self.evaluate()
+            if board.can_play(i):
+                board.play(i)
+                self.last_stats.nodes += 1
+                win = board.last_move_won()
+                board.undo()
+                if win:
+                    return i, self.evaluate()
         
         # If no winning move found, choose a random valid column
         valid_columns = np.where(game.get_available() != -1)[0]
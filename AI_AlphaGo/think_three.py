@@ -1,4 +1,3 @@
-from copy import deepcopy
 import random
 import time
 import numpy as np
@@ -9,66 +8,61 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from Simulation.Board import ConnectFourBoard
 from Constant import RED, YELLOW, IDLE 
+from AI_AlphaGo.search_stats import SearchStats
 
 class Think_Three :
     def __init__(self, color=RED, timeout=None) :
         self.color = color
         self.name = 'Think Three'
         self.timeout = timeout
+        self.last_stats = None      # SearchStats của nước đi gần nhất, nodes = số nước đã thử
 
     def set_color(self, color) :
         self.color = color
 
     def evaluate(self, game, start_time) :
-        valid_columns = np.where(self.game.get_available() > -1)[0]
+        """Đếm, cho từng nước đầu, xem có chuỗi 3 nước (mình - đối thủ - mình) nào thắng không. Cột đầy là -1.
+        Đi tại chỗ (play/undo) trên 1 bản sao của bàn cờ."""
+        valid_columns = game.get_available_columns()
+        board = game.copy()
 
         # Look ahead three moves with timeout
         w3 = []
-        first_move_scores:list = [-1] * self.game.columns
+        first_move_scores:list = [-1] * game.columns
         for i in valid_columns :
             first_move_scores[i] = 0
         
         for i in valid_columns:
             # Check if we're running out of time
-            if time.time() - start_time > self.timeout * 0.7:
-                # If we have some evaluated moves, choose the best
-                if w3:
-                    # Count occurrences of each first move in winning sequences
-                    for move in w3:
-                        first_move_scores[move] += 1
-                    return max(first_move_scores, key=first_move_scores.get)
-                else:
-                    # Fall back to random valid move
-                    return random.choice(valid_columns)
-                    
-            try:
-                game_clone = deepcopy(self.game)
-                if game_clone.drop_piece(i):  # This changes turn to opponent
-                    opponent_valid_columns = [c for c in range(self.game.columns) if game_clone.board[0][c] == 0]
-                    
-                    for j in opponent_valid_columns:
-                        # Check if we're running out of time
-                        if time.time() - start_time > self.timeout:
-                            break
-                            
-                        game_clone2 = deepcopy(game_clone)
-                        if game_clone2.drop_piece(j):  # This changes turn back to original player
-                            player_valid_columns = [c for c in range(self.game.columns) if game_clone2.board[0][c] == 0]
-                            
-                            for k in player_valid_columns:
-                                # Final timeout check
-                                if time.time() - start_time > self.timeout:
-                                    break
-                                    
-                                game_clone3 = deepcopy(game_clone2)
-                                if game_clone3.drop_piece(k) and game_clone3.check_win(self.color):
-                                    w3.append(i)
-                                    # Once we find a winning path from this first move, we can stop
-                                    # exploring other paths from the same first move
-                                    break
-            except Exception as e:
-                print(f"Error in Think Three AI: {e}")
-                continue
+            if self.timeout is not None and time.time() - start_time > self.timeout * 0.7:
+                break
+
+            board.play(i)  # This changes turn to opponent
+            self.last_stats.nodes += 1
+            if not board.last_move_won():
+                for j in board.get_available_columns():
+                    # Check if we're running out of time
+                    if self.timeout is not None and time.time() - start_time > self.timeout:
+                        break
+
+                    board.play(j)  # This changes turn back to original player
+                    self.last_stats.nodes += 1
+                    found = False
+                    if not board.last_move_won():
+                        for k in board.get_available_columns():
+                            board.play(k)
+                            self.last_stats.nodes += 1
+                            found = board.last_move_won()
+                            board.undo()
+                            if found:
+                                # Once we find a winning path from this first move, we can stop
+                                # exploring other paths from the same first move
+                                break
+                    board.undo()
+                    if found:
+                        w3.append(i)
+                        break
+            board.undo()
         
         # Count occurrences of each first move in winning sequences
         for move in w3:
@@ -77,6 +71,12 @@ class Think_Three :
         return first_move_scores
     
     def get_move(self, game, max_time=1.0):
+        self.last_stats = SearchStats(self.name)
+        result = self.choose_move(game, max_time)
+        self.last_stats.finish('rule')
+        return result
+
+    def choose_move(self, game, max_time=1.0):
         """Enhanced AI that looks ahead three moves.
         
         Args:
@@ -97,27 +97,42 @@ class Think_Three :
         opponent = -self.color
         valid_columns = np.where(game.get_available() != -1)[0]
 
+        # Thắng ngay / chặn / tránh: play rồi undo trên cùng bản sao này (evaluate() dùng bản sao riêng của nó)
+        board = game.copy()
+
         # Try to win in one move
         for i in valid_columns:
-            game_clone = deepcopy(game)
-            if game_clone.drop_piece(i) and game_clone.check_win(self.color):
+            board.play(i)
+            self.last_stats.nodes += 1
+            win = board.last_move_won()
+            board.undo()
+            if win:
                 return i, None
         
         # Block opponent's winning move
+        board.turn = opponent  # Set the turn to opponent for the look-ahead
         for i in valid_columns:
-            game_clone = deepcopy(game)
-            game_clone.turn = opponent  # Set the turn to opponent for the clone
-            if game_clone.drop_piece(i) and game_clone.check_win(opponent):
+            board.play(i)
+            self.last_stats.nodes += 1
+            win = board.last_move_won()
+            board.undo()
+            if win:
                 return i, None
+        board.turn = game.turn
         
         avoid = []
         # Look ahead to avoid moves that allow opponent to win next turn
         for i in valid_columns:
-            game_clone = deepcopy(game)
-            if game_clone.drop_piece(i):  # This changes turn to opponent
-                # Check if dropping in the same column would give opponent a win
-                if game_clone.drop_piece(i) and game_clone.check_win(turn=opponent):
+            board.play(i)  # This changes turn to opponent
+            self.last_stats.nodes += 1
+            # Check if dropping in the same column would give opponent a win
+            if board.can_play(i):
+                board.play(i)
+                self.last_stats.nodes += 1
+                if board.last_move_won():
                     avoid.append(i)
+                board.undo()
+            board.undo()
         
         if avoid:
             valid_columns = [c for c in valid_columns if c not in avoid]
@@ -1,4 +1,3 @@
-from copy import deepcopy
 import random
 
 
@@ -10,12 +9,14 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from Simulation.Board import ConnectFourBoard
 from Constant import RED, YELLOW, IDLE 
+from AI_AlphaGo.search_stats import SearchStats
 
 class Think_Two:
     def __init__(self, timeout=None, color=RED):
         self.name = 'Think Two'
         self.color = color
         self.timeout = timeout
+        self.last_stats = None      # SearchStats của nước đi gần nhất, nodes = số nước đã thử
         
     def set_color(self, color):
         self.color = color
@@ -24,6 +25,12 @@ class Think_Two:
         return None
 
     def get_move(self, game:ConnectFourBoard):
+        self.last_stats = SearchStats(self.name)
+        result = self.choose_move(game)
+        self.last_stats.finish('rule')
+        return result
+
+    def choose_move(self, game:ConnectFourBoard):
         """AI that checks for winning moves and blocks opponent's winning moves.
         
         Args:
@@ -38,27 +45,42 @@ class Think_Two:
         opponent = -self.color
         valid_columns = np.where(game.get_available() != -1)[0]
 
+        # Think Two chỉ nhìn trước 2 nước: mỗi nước thử được play rồi undo trên bản sao này
+        board = game.copy()
+
         # Try to win in one move
         for i in valid_columns:
-            game_clone = deepcopy(game)
-            if game_clone.drop_piece(i) and game_clone.check_win(self.color):
+            board.play(i)
+            self.last_stats.nodes += 1
+            win = board.last_move_won()
+            board.undo()
+            if win:
                 return i, self.evaluate()
         
         # Block opponent's winning move
+        board.turn = opponent  # Set the turn to opponent for the look-ahead
         for i in valid_columns:
-            game_clone = deepcopy(game)
-            game_clone.turn = opponent  # Set the turn to opponent for the clone
-            if game_clone.drop_piece(i) and game_clone.check_win(opponent):
+            board.play(i)
+            self.last_stats.nodes += 1
+            win = board.last_move_won()
+            board.undo()
+            if win:
                 return i, self.evaluate()
+        board.turn = game.turn
         
         avoid = []
         # Look ahead to avoid moves that allow opponent to win next turn
         for i in valid_columns:
-            game_clone = deepcopy(game)
-            if game_clone.drop_piece(i):  # This changes turn to opponent
-                # Check if dropping in the same column would give opponent a win
-                if game_clone.drop_piece(i) and game_clone.check_win(turn=opponent):
+            board.play(i)  # This changes turn to opponent
+            self.last_stats.nodes += 1
+            # Check if dropping in the same column would give opponent a win
+            if board.can_play(i):
+                board.play(i)
+                self.last_stats.nodes += 1
+                if board.last_move_won():
                     avoid.append(i)
+                board.undo()
+            board.undo()
         
         if avoid:
             valid_columns = [c for c in valid_columns if c not in avoid]
@@ -0,0 +1,136 @@
+import numpy as np
+import struct
+from multiprocessing import shared_memory
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+EXACT = 1           # Điểm chính xác (alpha < score < beta)
+LOWER = 2           # Fail-high: điểm thật >= score
+UPPER = 3           # Fail-low : điểm thật <= score
+
+NO_MOVE = -1
+
+ENTRY_WORDS = 3     # check, score_bits, meta
+ENTRY_BYTES = ENTRY_WORDS * 8
+
+
+def pack_meta(depth:int, flag:int, move:int, generation:int =0) :
+    """depth, flag, move (+1 để NO_MOVE thành 0), generation gói vào 1 word, mỗi trường 8 bit."""
+    return (depth & 0xFF) | (flag << 8) | ((move + 1) << 16) | ((generation & 0xFF) << 24)
+
+def unpack_meta(meta:int) :
+    return meta & 0xFF, (meta >> 8) & 0xFF, ((meta >> 16) & 0xFF) - 1
+
+def float_bits(value:float) :
+    return struct.unpack('<Q', struct.pack('<d', value))[0]
+
+def bits_float(bits:int) :
+    return struct.unpack('<d', struct.pack('<Q', bits))[0]
+
+
+class TranspositionTable :
+    ###
+    #   Bảng băm kích thước cố định, key là Zobrist hash_key của ConnectFourBoard (đã gồm lượt đi).
+    #       table       :   (size, 3) uint64, slot = key & (size - 1), mỗi slot gồm:
+    #                           check       =   key ^ score_bits ^ meta
+    #                           score_bits  =   bit của điểm (float64)
+    #                           meta        =   pack_meta(depth, flag, move, generation), flag = 0 nghĩa là slot trống
+    #   Thay thế theo độ sâu: chỉ ghi đè khi slot trống, kết quả mới được tìm sâu hơn (hoặc bằng), hoặc slot là của
+    #   thế cờ khác từ lần tìm cũ (generation khác). Bảng được giữ qua các nước đi trong 1 ván, generation = số quân
+    #   trên bàn ở gốc (new_search), nên entry của các nước trước vẫn dùng được nhưng nhường chỗ cho entry mới.
+    #
+    #   Bảng có thể nằm trong multiprocessing.shared_memory để nhiều process cùng đọc/ghi (xem create_shared/attach).
+    #   Ghi không khoá: một slot bị 2 process ghi xen kẽ sẽ không khớp check, khi đọc được coi như không có.
+    ###
+
+    def __init__(self, size:int =1 << 18, buffer=None) :
+        if size <= 0 or size & (size - 1) :
+            raise ValueError(f'Transposition table size must be a power of two, got {size}')
+
+        self.size = size
+        self.mask = size - 1
+        self.shm = None
+        self.owner = True               # False với bảng attach từ process khác: không được xoá bảng dùng chung
+        if buffer is None :
+            self.table = np.zeros((size, ENTRY_WORDS), dtype=np.uint64)
+        else :
+            self.table = np.ndarray((size, ENTRY_WORDS), dtype=np.uint64, buffer=buffer)
+
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    @classmethod
+    def create_shared(cls, size:int =1 << 18) :
+        """Tạo bảng mới trong shared memory. Process khác mở lại bằng attach(table.shm.name, size)."""
+
+        shm = shared_memory.SharedMemory(create=True, size=size * ENTRY_BYTES)
+        table = cls(size, shm.buf)
+        table.shm = shm
+        table.table[:] = 0
+        return table
+
+    @classmethod
+    def attach(cls, name:str, size:int) :
+        shm = shared_memory.SharedMemory(name=name)
+        table = cls(size, shm.buf)
+        table.shm = shm
+        table.owner = False
+        return table
+
+    def close(self, unlink:bool =False) :
+        """Đóng shared memory (unlink=True: xoá hẳn, chỉ process tạo bảng mới nên gọi)."""
+
+        if self.shm is None :
+            return
+        self.table = None
+        self.shm.close()
+        if unlink :
+            self.shm.unlink()
+        self.shm = None
+
+    def clear(self) :
+        self.table[:] = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self, generation:int) :
+        """Bắt đầu 1 lần tìm mới (gốc có 'generation' quân), entry của các lần trước trở thành entry cũ."""
+        self.generation = generation & 0xFF
+
+    def probe(self, key:int) :
+        """Trả về (depth, flag, score, move) của thế cờ 'key', hoặc None nếu chưa có."""
+
+        self.probes += 1
+        check, score_bits, meta = self.table[key & self.mask].tolist()
+        if meta == 0 or check ^ score_bits ^ meta != key :
+            return None
+
+        self.hits += 1
+        depth, flag, move = unpack_meta(meta)
+        return depth, flag, bits_float(score_bits), move
+
+    def store(self, key:int, depth:int, flag:int, score:float, move:int =NO_MOVE) :
+        index = key & self.mask
+        old_check, old_bits, old_meta = self.table[index].tolist()
+        if old_meta != 0 and (old_meta & 0xFF) > depth :
+            # Entry sâu hơn được giữ nếu cùng thế cờ, hoặc là thế cờ khác nhưng thuộc lần tìm hiện tại
+            if old_check ^ old_bits ^ old_meta == key or (old_meta >> 24) == self.generation :
+                return
+
+        score_bits = float_bits(score)
+        meta = pack_meta(depth, flag, NO_MOVE if move is None else move, self.generation)
+        self.table[index] = (key ^ score_bits ^ meta, score_bits, meta)
+        self.stores += 1
+
+    def hit_rate(self) :
+        return self.hits / self.probes if self.probes else 0.0
+
+    def usage(self) :
+        """Tỉ lệ slot đang được dùng."""
+        return float(np.count_nonzero(self.table[:, 2])) / self.size
@@ -0,0 +1,63 @@
+import argparse
+import glob
+import zipfile
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Simulation.Dataset import DatasetReader, save_packed
+
+###
+#   Chuyển dataset cũ (.npy float64 / .npz X, y) sang định dạng packed (xem Simulation/Dataset.py).
+#       python DL/convert_data.py                       :   chuyển toàn bộ DL/data
+#       python DL/convert_data.py DL/data/data_MO_MO.npz
+#   File gốc được giữ nguyên; file mới được đọc lại và so sánh với file gốc trước khi báo thành công.
+###
+
+def packed_path(source) :
+    if isinstance(source, tuple) :
+        folder, name = os.path.split(source[0])
+        return os.path.join(folder, name.replace('Train_', '').replace('.npy', '.packed.npz'))
+    return source[:-len('.npz')] + '.packed.npz'
+
+def convert(source, output_path) :
+    reader = DatasetReader([source])
+    train, label = reader.gather(np.arange(len(reader)))
+    save_packed(output_path, train, label)
+
+    packed_train, packed_label = DatasetReader([output_path]).gather(np.arange(len(train)))
+    if not np.array_equal(packed_train, train) :
+        raise ValueError(f'{output_path}: boards do not round-trip')
+    if not np.array_equal(packed_label, label) :
+        raise ValueError(f'{output_path}: labels do not round-trip')
+
+    before = sum(os.path.getsize(path) for path in (source if isinstance(source, tuple) else (source,)))
+    after = os.path.getsize(output_path)
+    print(f'{output_path}: {len(train)} samples, {before} -> {after} bytes ({before / after:.1f}x)')
+
+def default_sources(folder) :
+    sources = []
+    for train_path in sorted(glob.glob(os.path.join(folder, 'Train_*.npy'))) :
+        label_path = train_path.replace('Train_', 'Label_')
+        if os.path.exists(label_path) :
+            sources.append((train_path, label_path))
+    sources += [path for path in sorted(glob.glob(os.path.join(folder, '*.npz')))
+                if not path.endswith('.packed.npz') and is_dataset(path)]
+    return sources
+
+def is_dataset(npz_path) :
+    """File .npz có chứa 2 mảng X, y không (bỏ qua các file khác trong thư mục, ví dụ opening_book.npz)."""
+    with zipfile.ZipFile(npz_path) as archive :
+        names = set(archive.namelist())
+    return {'X.npy', 'y.npy'} <= names
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Convert datasets to the bit-packed format')
+    parser.add_argument('sources', nargs='*', help='.npz files or TRAIN.npy,LABEL.npy pairs (default: every dataset in --folder)')
+    parser.add_argument('--folder', default='DL/data')
+    args = parser.parse_args()
+
+    sources = [tuple(source.split(',')) if ',' in source else source for source in args.sources] or default_sources(args.folder)
+    for source in sources :
+        convert(source, packed_path(source))
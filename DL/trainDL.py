@@ -2,24 +2,34 @@ from tensorflow.keras.utils import to_categorical
 from tensorflow.keras.layers import Dense
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, Flatten
-import pickle
+import glob
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Simulation.Dataset import DatasetReader
+
+# Dataset được memory-map, mỗi batch mới đọc từ đĩa nên không bị giới hạn bởi RAM
+# Ưu tiên bản packed (python DL/convert_data.py), bung ra (N, rows, columns, 1) chỉ khi lấy batch
+packed = sorted(glob.glob("DL/data/data_*.packed.npz"))
+reader = DatasetReader(packed or sorted(glob.glob("DL/data/data_*.npz")))
+rows, columns = reader.sample_shape
+batch_size = 64
 
 model = Sequential()
 
-model.add(Conv2D(filter = 128, kernel_size = (3, 3), padding = "same", activation = "relu", input_shape = (7, 6, 1)))
+model.add(Conv2D(filters = 128, kernel_size = (3, 3), padding = "same", activation = "relu", input_shape = (rows, columns, 1)))
 model.add(Flatten())
 model.add(Dense(units = 64, activation = "relu"))
 model.add(Dense(units = 64, activation = "relu"))
 
-model.add(Dense(unit = 7, activation = "softmax"))
+model.add(Dense(units = columns, activation = "softmax"))
 model.compile(loss='categorical_crossentropy',
                    optimizer='adam', 
                    metrics=['accuracy'])
 
-with open("DL/Files/data.pkl", "rb") as f:
-    train, label = pickle.load(f)
-
-model.fit(train, label, epochs = 100, verbose = 1)
+model.fit(reader.keras_generator(batch_size=batch_size, seed=0),
+          steps_per_epoch = reader.steps_per_epoch(batch_size),
+          epochs = 100, verbose = 1)
 
 model.save("DL/Files/evaluate.h5")
-
@@ -0,0 +1,157 @@
+import argparse
+import json
+import multiprocessing as mp
+import random
+import time
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from Simulation.Board import ConnectFourBoard
+from Constant import RED, YELLOW
+from AI_AlphaGo.minimaxVsABPrunning import MinimaxAI, DEFAULT_WEIGHT, TUNED_WEIGHT_PATH
+
+###
+#   Tune 5 trọng số đánh giá của MinimaxAI ([allie_3, allie_2, enemy_3, enemy_2, center]) bằng SPSA:
+#   mỗi vòng lấy 1 hướng nhiễu ngẫu nhiên delta (+-1 mỗi trọng số), cho theta + c*delta đấu với theta - c*delta
+#   trên cùng 1 bộ khai cuộc cố định (mỗi khai cuộc 2 ván đổi màu), rồi đẩy theta theo hướng của bên thắng nhiều hơn.
+#
+#       python DL/tune_weights.py                               :   tune từ DEFAULT_WEIGHT, ghi DL/data/minimax_weight.json
+#       python DL/tune_weights.py --iterations 100 --depth 4 --workers 4
+#
+#   Các ván chạy song song trên 1 process pool, không giao diện. MinimaxAI tìm cố định 'depth' (không dùng timeout)
+#   nên kết quả chỉ phụ thuộc seed, không phụ thuộc tốc độ máy. Cuối cùng theta đấu kiểm tra với bộ trọng số ban đầu
+#   trên 1 bộ khai cuộc khác (seed + 1): file kết quả chứa bộ thắng trong trận đó. Dùng: MinimaxAI(weight=load_weight())
+###
+
+TUNE_TT_SIZE = 1 << 14                  # Engine sống 1 ván ở độ sâu thấp, không cần TT lớn
+PERTURBATION = [0.05, 0.05, 0.05, 0.05, 0.01]   # c: biên độ nhiễu ban đầu của từng trọng số
+LEARNING_RATE = 2.0                     # a: bước ban đầu, tính theo đơn vị của c
+STABILITY = 10                          # A: làm chậm việc giảm bước ở các vòng đầu
+ALPHA, GAMMA = 0.602, 0.101             # Số mũ chuẩn của SPSA cho a_k và c_k
+
+
+def make_openings(count:int, plies:int, seed:int, shape:tuple[int, int] =(6, 7)) :
+    """'count' khai cuộc khác nhau (tính cả đối xứng), mỗi khai cuộc là 'plies' nước ngẫu nhiên chưa kết thúc ván."""
+
+    rng = random.Random(seed)
+    openings, seen = [], set()
+    for _ in range(count * 100) :
+        if len(openings) == count :
+            break
+        game = ConnectFourBoard(shape)
+        moves = []
+        for _ in range(plies) :
+            col = rng.choice(game.get_available_columns())
+            game.play(col)
+            moves.append(col)
+            if game.last_move_won() :
+                break
+        if game.last_move_won() or game.canonical_key() in seen :
+            continue
+        seen.add(game.canonical_key())
+        openings.append(moves)
+    return openings
+
+def play_game(task) :
+    """1 ván không giao diện. task = (weight_red, weight_yellow, opening, shape, depth), trả về màu thắng (0 nếu hoà)."""
+
+    weight_red, weight_yellow, opening, shape, depth = task
+    players = {RED: MinimaxAI(color=RED, weight=weight_red, depth=depth, tt_size=TUNE_TT_SIZE),
+               YELLOW: MinimaxAI(color=YELLOW, weight=weight_yellow, depth=depth, tt_size=TUNE_TT_SIZE)}
+
+    game = ConnectFourBoard(shape)
+    for col in opening :
+        game.play(col)
+
+    while not game.is_full() :
+        mover = game.turn
+        col, _ = players[mover].get_move(game)
+        game.play(col)
+        if game.last_move_won() :
+            return mover
+    return 0
+
+def match(pool, weight_a:list[float], weight_b:list[float], openings:list[list[int]], shape:tuple[int, int], depth:int) :
+    """Điểm của weight_a khi đấu weight_b (thắng 1, hoà 0.5), mỗi khai cuộc 2 ván đổi màu. Trả về (điểm, số ván)."""
+
+    tasks = []
+    for opening in openings :
+        tasks.append((weight_a, weight_b, opening, shape, depth))
+        tasks.append((weight_b, weight_a, opening, shape, depth))
+
+    points = 0.0
+    for index, winner in enumerate(pool.map(play_game, tasks)) :
+        color_a = RED if index % 2 == 0 else YELLOW
+        points += 1.0 if winner == color_a else 0.5 if winner == 0 else 0.0
+    return points, len(tasks)
+
+def spsa(pool, start:list[float], openings:list[list[int]], iterations:int, shape:tuple[int, int], depth:int, seed:int) :
+    """Tối đa hoá tỉ lệ thắng bằng SPSA, trả về theta cuối cùng và lịch sử từng vòng."""
+
+    rng = np.random.default_rng(seed)
+    theta = np.array(start, dtype=np.float64)
+    c0 = np.array(PERTURBATION, dtype=np.float64)
+    history = []
+
+    for k in range(iterations) :
+        start_time = time.time()
+        a_k = LEARNING_RATE / (k + 1 + STABILITY) ** ALPHA
+        c_k = c0 / (k + 1) ** GAMMA
+        delta = rng.choice([-1.0, 1.0], size=theta.shape)
+
+        plus = np.maximum(theta + c_k * delta, 0.0)
+        minus = np.maximum(theta - c_k * delta, 0.0)
+        points, games = match(pool, plus.tolist(), minus.tolist(), openings, shape, depth)
+
+        # Kết quả trong [-1, 1]: 1 nghĩa là theta + c*delta thắng hết. Bước đi tỉ lệ với c0 để các trọng số
+        # có độ lớn khác nhau (center nhỏ hơn hẳn) cùng đi tương ứng với nhiễu của chúng
+        result = 2.0 * points / games - 1.0
+        theta = np.maximum(theta + a_k * result * c0 * delta, 0.0)
+
+        history.append({'iteration': k + 1, 'score_plus': points / games, 'weight': theta.round(5).tolist()})
+        print(f'iteration {k + 1:>3}/{iterations}: plus scored {points:>4.1f}/{games}, '
+              f'weight {np.round(theta, 4).tolist()} ({time.time() - start_time:.1f}s)', flush=True)
+
+    return theta.tolist(), history
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Tune the MinimaxAI evaluation weights with SPSA self-play')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--openings', type=int, default=12, help='Fixed opening positions, each played twice per match (default: 12)')
+    parser.add_argument('--verify-openings', type=int, default=24, help='Held-out openings for the final match (default: 24)')
+    parser.add_argument('--opening-plies', type=int, default=4)
+    parser.add_argument('--depth', type=int, default=4, help='Fixed search depth of both sides (default: 4)')
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--columns', type=int, default=7)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', type=float, nargs=5, default=DEFAULT_WEIGHT, metavar='W', help='Starting weights')
+    parser.add_argument('--output', default=TUNED_WEIGHT_PATH)
+    args = parser.parse_args()
+
+    shape = (args.rows, args.columns)
+    openings = make_openings(args.openings, args.opening_plies, args.seed, shape)
+    verify_openings = make_openings(args.verify_openings, args.opening_plies, args.seed + 1, shape)
+    start_time = time.time()
+
+    with mp.Pool(args.workers) as pool :
+        tuned, history = spsa(pool, args.start, openings, args.iterations, shape, args.depth, args.seed)
+        points, games = match(pool, tuned, list(args.start), verify_openings, shape, args.depth)
+
+    print(f'tuned weight {np.round(tuned, 4).tolist()} scored {points}/{games} against the start '
+          f'on held-out openings ({time.time() - start_time:.0f}s)')
+    weight = tuned if points > games / 2 else list(args.start)
+    if weight is not tuned :
+        print('tuned weight did not beat the start, keeping the start')
+
+    record = {'weight': weight, 'tuned': tuned, 'start': list(args.start),
+              'score_vs_start': points / games, 'games_vs_start': games,
+              'iterations': args.iterations, 'openings': openings, 'verify_openings': verify_openings,
+              'depth': args.depth, 'shape': list(shape), 'seed': args.seed, 'history': history}
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f :
+        json.dump(record, f, indent=1)
+    print(f'written to {args.output}')
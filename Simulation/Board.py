@@ -2,13 +2,209 @@
 
 import numpy as np
 import pickle
-from copy import deepcopy
+import random
 
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from Constant import RED, YELLOW, IDLE
+from Simulation.Dataset import DatasetWriter, DatasetReader
+
+
+ZOBRIST_SEED = 20250515         # Cố định seed để key giống nhau giữa các process/lần chạy (opening book, dataset, ...)
+_ZOBRIST_TABLES = {}
+
+def zobrist_tables(shape:tuple[int, int]) :
+    """Bảng Zobrist 64-bit của một kích thước bàn cờ, được tạo một lần rồi dùng chung.
+
+    Returns:
+        pieces          :   pieces[color][col][h] là key của quân 'color' ở ô thứ h (từ dưới lên) của cột col
+        mirror_pieces   :   như pieces nhưng cho bàn cờ lật trái-phải (cột col <-> cột columns - 1 - col)
+        side            :   key được XOR vào khi tới lượt YELLOW
+    """
+    shape = (int(shape[0]), int(shape[1]))
+    if shape not in _ZOBRIST_TABLES :
+        rows, columns = shape
+        rng = random.Random(ZOBRIST_SEED)
+
+        pieces = {color: [[rng.getrandbits(64) for _ in range(rows)] for _ in range(columns)]
+                  for color in (RED, YELLOW)}
+        mirror_pieces = {color: pieces[color][::-1] for color in (RED, YELLOW)}
+        side = rng.getrandbits(64)
+
+        _ZOBRIST_TABLES[shape] = (pieces, mirror_pieces, side)
+
+    return _ZOBRIST_TABLES[shape]
+
+
+_WINNING_WINDOWS = {}
+
+def winning_windows(shape:tuple[int, int]) :
+    """Chỉ số phẳng (theo board.ravel()) của mọi cửa sổ 4 ô thẳng hàng, dạng array (n_windows, 4).
+
+    Thứ tự: ngang, dọc, chéo xuống (trái trên -> phải dưới), chéo lên (trái dưới -> phải trên).
+    Bàn 6x7 có 69 cửa sổ. Được tính một lần cho mỗi kích thước bàn cờ rồi dùng chung (read-only).
+    """
+    shape = (int(shape[0]), int(shape[1]))
+    if shape not in _WINNING_WINDOWS :
+        rows, columns = shape
+        cells = np.arange(rows * columns).reshape(rows, columns)
+        windows = []
+
+        for r in range(rows) :
+            for c in range(columns - 3) :
+                windows.append(cells[r, c:c + 4])
+        for c in range(columns) :
+            for r in range(rows - 3) :
+                windows.append(cells[r:r + 4, c])
+        for r in range(rows - 3) :
+            for c in range(columns - 3) :
+                windows.append([cells[r + i, c + i] for i in range(4)])
+        for r in range(3, rows) :
+            for c in range(columns - 3) :
+                windows.append([cells[r - i, c + i] for i in range(4)])
+
+        windows = np.array(windows, dtype=np.intp).reshape(-1, 4)
+        windows.flags.writeable = False
+        _WINNING_WINDOWS[shape] = windows
+
+    return _WINNING_WINDOWS[shape]
+
+
+class MoveHistory:
+    ###
+    #
+    #  Lịch sử một ván đấu, lưu trong các mảng được cấp phát sẵn (1 ván có tối đa rows * columns nước đi).
+    #  Chỉ lưu dãy nước đi (và ma trận đánh giá nếu có). Snapshot bàn cờ không được lưu
+    #  mà được dựng lại từ dãy nước đi khi cần đọc.
+    #
+    #   Attributes:
+    #       length          :   số nước đi đã ghi
+    #       moves           :   (capacity,) cột của từng nước đi
+    #       colors          :   (capacity,) màu của bên đã đi nước đó
+    #       valuations      :   (capacity, columns) float64, đánh giá nước đi (move_valuated) giữ nguyên độ chính xác, None nếu không lưu
+    #       initial_state   :   ma trận bàn cờ lúc bắt đầu ghi lịch sử
+    #
+    #   Notices:
+    #       history[color] vẫn trả về list (state * color, move_valuated) như kiểu dict cũ,
+    #       trong đó state là bàn cờ NGAY TRƯỚC nước đi của 'color'.
+    ###
+
+    def __init__(self, shape:tuple[int, int], initial_state:np.array =None, save_valuations:bool =True):
+        self.shape = shape
+        self.rows, self.columns = shape
+        self.capacity = self.rows * self.columns
+
+        self.moves = np.zeros((self.capacity,), dtype=np.int8)
+        self.colors = np.zeros((self.capacity,), dtype=np.int8)
+        self.valuations = np.zeros((self.capacity, self.columns), dtype=np.float64) if save_valuations else None
+
+        self.reset(initial_state)
+
+    def reset(self, initial_state:np.array =None) :
+        """Xoá lịch sử, bắt đầu ghi lại từ 'initial_state' (mặc định là bàn cờ trống)."""
+
+        if initial_state is None :
+            self.initial_state = np.zeros(self.shape, dtype=np.int8)
+        else :
+            self.initial_state = np.array(initial_state, dtype=np.int8)
+        self.length = 0
+        self._states = None
+
+    def __len__(self) :
+        return self.length
+
+    def append(self, column:int, color:int, move_valuated:np.array =None) :
+        """Ghi thêm 1 nước đi, O(1). move_valuated = None thì ghi one-hot của cột vừa đánh."""
+
+        if self.valuations is not None :
+            if move_valuated is None :
+                self.valuations[self.length] = 0
+                self.valuations[self.length, column] = 1
+            else :
+                self.valuations[self.length] = move_valuated
+
+        self.moves[self.length] = column
+        self.colors[self.length] = color
+        self.length += 1
+        self._states = None
+
+    def truncate(self, length:int) :
+        """Chỉ giữ lại 'length' nước đi đầu tiên."""
+
+        self.length = max(0, min(length, self.length))
+        self._states = None
+
+    def count(self, color:int) :
+        """Số nước đi của 'color' đã được ghi."""
+
+        return int(np.count_nonzero(self.colors[:self.length] == color))
+
+    def states(self) :
+        """(length, rows, columns) int8: bàn cờ ngay trước mỗi nước đi. Được dựng lại từ dãy nước đi rồi cache."""
+
+        if self._states is None :
+            states = np.empty((self.length, self.rows, self.columns), dtype=np.int8)
+            board = self.initial_state.copy()
+            heights = np.count_nonzero(board, axis=0)
+
+            for i in range(self.length) :
+                states[i] = board
+                column = self.moves[i]
+                board[self.rows - 1 - heights[column], column] = self.colors[i]
+                heights[column] += 1
+
+            self._states = states
+
+        return self._states
+
+    def samples(self, color:int, skip:int =0) :
+        """Các cặp (state * color, move_valuated) của 'color', bỏ qua 'skip' nước đầu tiên của bên đó.
+
+        Returns:
+            states      :   (k, rows, columns) int8, quân của 'color' luôn mang giá trị 1
+            valuations  :   (k, columns), None nếu không lưu đánh giá
+        """
+
+        index = np.flatnonzero(self.colors[:self.length] == color)[skip:]
+        states = self.states()[index] * np.int8(color)
+        valuations = None if self.valuations is None else self.valuations[index]
+        return states, valuations
+
+    def __getitem__(self, color:int) :
+        states, valuations = self.samples(color)
+        if valuations is None :
+            return [(state, None) for state in states]
+        return list(zip(states, valuations))
+
+    def copy(self) :
+        """Bản sao độc lập (ví dụ để lưu lại ván đã kết thúc)."""
+
+        clone = MoveHistory(self.shape, self.initial_state, save_valuations=self.valuations is not None)
+        clone.moves[:] = self.moves
+        clone.colors[:] = self.colors
+        if self.valuations is not None :
+            clone.valuations[:] = self.valuations
+        clone.length = self.length
+        return clone
+
+    def replay(self) :
+        """ConnectFourBoard ở thế cờ cuối cùng của lịch sử này."""
+
+        first_to_move = int(self.colors[0]) if self.length > 0 else RED
+        game = ConnectFourBoard(shape=self.shape, first_to_move=first_to_move)
+        game.reset_game(first_to_move, self.initial_state)
+        for i in range(self.length) :
+            game.turn = int(self.colors[i])
+            game.play(int(self.moves[i]))
+        return game
+
+    def winner(self) :
+        """Bên thắng của ván (RED/YELLOW), IDLE nếu chưa có ai thắng."""
+
+        game = self.replay()
+        return -game.turn if game.last_move_won() else IDLE
 
 
 class ConnectFourBoard:
@@ -20,10 +216,22 @@ class ConnectFourBoard:
     #
     #   Attributes:
     #       rows x columns  :   kích thước ma trận
-    #       board           :   bàn cờ (??? RED/YELLOW là giá trị nào thì chịu)
+    #       board           :   bàn cờ dạng ma trận (RED/YELLOW/IDLE), chỉ được dựng lại từ bitboard khi cần đọc
     #       turn            :   lượt HIỆN TẠI do bên nào đi ( 1: red, -1: yellow)
+    #       current_mask    :   bitboard các quân của bên đang tới lượt (turn)
+    #       occupied_mask   :   bitboard tất cả các ô đã có quân
+    #       heights         :   số quân hiện có ở mỗi cột, cập nhật dần theo play/undo
+    #       moves           :   stack các cột đã đánh (kể từ create_board), phục vụ undo()
+    #       hash_key        :   Zobrist key 64-bit của thế cờ (kèm lượt đi), cập nhật dần theo play/undo
+    #       mirror_key      :   Zobrist key của ảnh đối xứng trái-phải, xem canonical_key()
     #       available       :   Vị trí sẽ được đánh vào tiếp theo của mỗi cột
-    #       history         :   history[RED] sẽ lưu trữ lịch sử đấu của RED
+    #       history         :   MoveHistory của ván đấu (chỉ có khi save_history), history[RED] là lịch sử đấu của RED
+    #
+    #   Bitboard layout:
+    #       Mỗi cột chiếm (rows + 1) bit liên tiếp, bit thấp nhất là ô dưới cùng của cột.
+    #       Bit cao nhất của mỗi cột luôn bằng 0 (sentinel), nhờ vậy các phép dịch bit
+    #       khi kiểm tra 4 quân liên tiếp không bị tràn sang cột bên cạnh.
+    #       Ô (row, col) của ma trận board tương ứng bit: col * (rows + 1) + (rows - 1 - row)
     ###
 
     def __init__(self, shape:tuple[int, int] =(6, 7), first_to_move:int =RED, save_history:bool =False):
@@ -34,48 +242,141 @@ class ConnectFourBoard:
         self.shape = shape
         
         # Game state
+        self._turn = first_to_move
         self.create_board()
-        self.turn = first_to_move
         self.first_to_move = first_to_move
 
         if save_history :
             # Each record contain [current_state, move_valuation]. Will helpl on training DQN model
             print('Has history')
-            self.history:dict[int: list[tuple[np.array, np.array]]] \
-                    = {RED:    [],
-                       YELLOW: []}
+            self.history = MoveHistory(self.shape)
         
-    def append_history(self, current_state:np.array, move_valuate:np.array) :
+    def append_history(self, column:int, move_valuate:np.array) :
         """Append history-stack of the game board, if it did save history"""
 
         if hasattr(self, 'history') :           # if this board was initilized with history
 
-            self.history[self.turn].append((deepcopy(current_state) * self.turn, move_valuate))
+            self.history.append(column, self.turn, move_valuate)
+
+    def _setup_layout(self) :
+        """Tính trước các mask cố định theo kích thước bàn cờ."""
+
+        self.column_bits = self.rows + 1                                    # số bit của 1 cột (kèm sentinel)
+        self.column_mask = (1 << self.rows) - 1                             # các ô của cột 0
+        self.bottom_mask = sum(1 << (c * self.column_bits) for c in range(self.columns))
+        self.board_mask = self.bottom_mask * self.column_mask               # toàn bộ các ô của bàn cờ
+
+        # Bảng tra theo cột, để play/undo không phải tính lại phép dịch bit mỗi nước đi
+        self.column_shift = [c * self.column_bits for c in range(self.columns)]
+        self.column_bottom = [1 << shift for shift in self.column_shift]
+
+        # Thứ tự duyệt cột: ưu tiên cột giữa, sau đó lan dần ra 2 bên
+        center = self.columns // 2
+        self.column_order = sorted(range(self.columns), key=lambda c: (abs(c - center), -c))
 
+        self.zobrist_pieces, self.zobrist_mirror_pieces, self.zobrist_side = zobrist_tables(self.shape)
 
     def create_board(self, initilize_state:np.array =None):
-        """Create an empty game board."""
+        """Create an empty game board, or load it from a (rows x columns) matrix."""
 
         if initilize_state is not None :
-            self.board = deepcopy(initilize_state)
+            initilize_state = np.asarray(initilize_state)
             self.shape = initilize_state.shape
             self.rows, self.columns = initilize_state.shape
-        else :
-            self.board = np.zeros(shape=(self.rows, self.columns)) 
+
+        self._setup_layout()
+        self.occupied_mask = 0
+        red_mask = 0
+
+        if initilize_state is not None :
+            for c in range(self.columns) :
+                for h in range(self.rows) :
+                    piece = initilize_state[self.rows - 1 - h, c]
+                    if piece != IDLE :
+                        bit = 1 << (c * self.column_bits + h)
+                        self.occupied_mask |= bit
+                        if piece == RED :
+                            red_mask |= bit
+
+        self.current_mask = red_mask if self._turn == RED else red_mask ^ self.occupied_mask
+        self.heights = [((self.occupied_mask >> shift) & self.column_mask).bit_count() for shift in self.column_shift]
+        self.moves = []
+        self._board_view = None
+        self._compute_keys()
 
         return self.board
 
+    def _compute_keys(self) :
+        """Tính lại hash_key và mirror_key từ đầu (chỉ dùng khi nạp thế cờ, còn lại cập nhật dần)."""
+
+        self.hash_key = self.zobrist_side if self._turn == YELLOW else 0
+        self.mirror_key = self.hash_key
+
+        red_mask = self.get_mask(RED)
+        for c in range(self.columns) :
+            shift = self.column_shift[c]
+            for h in range(self.heights[c]) :
+                color = RED if (red_mask >> (shift + h)) & 1 else YELLOW
+                self.hash_key ^= self.zobrist_pieces[color][c][h]
+                self.mirror_key ^= self.zobrist_mirror_pieces[color][c][h]
+
+    def canonical_key(self) :
+        """Key chung cho một thế cờ và ảnh đối xứng trái-phải của nó."""
+
+        return min(self.hash_key, self.mirror_key)
+
+    @property
+    def turn(self) :
+        return self._turn
+
+    @turn.setter
+    def turn(self, color:int) :
+        # current_mask luôn là quân của bên đang tới lượt, nên đổi lượt thì phải lật lại mask
+        if color != self._turn :
+            self.current_mask ^= self.occupied_mask
+            self._turn = color
+            self.hash_key ^= self.zobrist_side
+            self.mirror_key ^= self.zobrist_side
+
+    @property
+    def board(self) :
+        """Ma trận (rows x columns) của bàn cờ. Chỉ được dựng lại từ bitboard khi thế cờ đã thay đổi."""
+
+        if self._board_view is None :
+            view = np.zeros(shape=(self.rows, self.columns), dtype=np.int8)
+            red_mask = self.get_mask(RED)
+
+            for c in range(self.columns) :
+                shift = self.column_shift[c]
+                for h in range(self.heights[c]) :
+                    view[self.rows - 1 - h, c] = RED if (red_mask >> (shift + h)) & 1 else YELLOW
+
+            view.flags.writeable = False        # chỉ để đọc, mọi thay đổi phải đi qua drop_piece/create_board
+            self._board_view = view
+
+        return self._board_view
+
+    @board.setter
+    def board(self, state:np.array) :
+        self.create_board(state)
+
+    def get_mask(self, color:int) :
+        """Bitboard các quân của màu 'color'."""
+
+        if color == self._turn :
+            return self.current_mask
+        return self.current_mask ^ self.occupied_mask
+
     def reset_game(self, firstMoving=RED, initilize_state:np.array =None):
         """Reset the game to its initial state."""
         self.first_to_move = firstMoving
-        self.turn = firstMoving
+        self._turn = firstMoving
         
         self.create_board(initilize_state)
 
 
         if hasattr(self, 'history') :
-            self.history[RED] = []
-            self.history[YELLOW] = []
+            self.history.reset(initilize_state)
             
     def get_available(self) :
         """
@@ -83,12 +384,17 @@ class ConnectFourBoard:
         Ví dụ: Cột 3 còn 3 vị trí trống thì: available[3] = 2
         """
 
-        return ((self.rows - 1) - np.count_nonzero(self.board, axis=0))
+        return (self.rows - 1) - np.array(self.heights)
+
+    def can_play(self, column:int) :
+        """Cột 'column' còn ô trống hay không."""
+
+        return self.heights[column] < self.rows
 
     def get_available_columns(self) :
-        """Trả về list các cột còn vị trí ô trống. Không ghi rõ trống tới hàng nào."""
-<<<<<<< HEAD
-        return np.where(self.get_available() > -1)[0]
+        """Trả về list các cột còn vị trí ô trống (ưu tiên cột giữa trước). Không ghi rõ trống tới hàng nào."""
+
+        return [c for c in self.column_order if self.can_play(c)]
     
     def get_next_open_row(self, col):
         """
@@ -97,28 +403,11 @@ class ConnectFourBoard:
         - int: số hàng nếu tìm thấy
         - None: nếu cột đã đầy
         """
-        for row in reversed(range(self.rows)):
-            if self.board[row][col] == IDLE:
-                return row
-        return None
-    
-=======
-        unordered = np.where(self.get_available() > -1)[0]
-        mid = unordered.size // 2  # Xác định chỉ mục giữa
-        ordered = [unordered[mid]]  # Bắt đầu với phần tử ở giữa
-        
-        left, right = mid - 1, mid + 1
-        while left >= 0 or right < unordered.size:
-            if right < unordered.size:
-                ordered.append(unordered[right])
-                right += 1
-            if left >= 0:
-                ordered.append(unordered[left])
-                left -= 1
-        
-        return ordered
+        height = self.heights[col]
+        if height == self.rows :
+            return None
+        return self.rows - 1 - height
 
->>>>>>> 6525399065de2f1cef29c9f6c52b8cd7c65b562d
     def drop_piece(self, column:int, move_valuated:np.array=None):
         """Attempt to drop a piece in the specified column.
         
@@ -130,20 +419,55 @@ class ConnectFourBoard:
             bool: True if the piece was successfully dropped, False otherwise
         """
         
-        row = self.rows - np.count_nonzero(self.board[:, column]) - 1
-        if (row < 0) :
+        column = int(column)
+        if (column < 0) or (column >= self.columns) or not self.can_play(column) :
             return False
         else :
-            if move_valuated is None :
-                move_valuated = np.zeros((self.columns,))
-                move_valuated[column] = 1
-
-            self.append_history(self.board, move_valuated)
+            # History chỉ ghi lại cột vừa đánh (vào mảng cấp phát sẵn), không cần dựng board hay one-hot nào
+            self.append_history(column, move_valuated)
 
-            self.board[row, column] = self.turn
-            self.turn = -self.turn      
+            self.play(column)
             return True
 
+    def play(self, column:int) :
+        """Đánh vào cột 'column' (không kiểm tra hợp lệ, không ghi history). Dùng cho search, đi kèm undo()."""
+
+        height = self.heights[column]
+        self.heights[column] = height + 1
+        self.hash_key ^= self.zobrist_pieces[self._turn][column][height] ^ self.zobrist_side
+        self.mirror_key ^= self.zobrist_mirror_pieces[self._turn][column][height] ^ self.zobrist_side
+
+        # Sau nước đi, current_mask trở thành quân của đối thủ (bên sẽ đi tiếp theo)
+        self.current_mask ^= self.occupied_mask
+        self.occupied_mask |= self.occupied_mask + self.column_bottom[column]
+        self._turn = -self._turn
+        self.moves.append(column)
+        self._board_view = None
+
+    def undo(self) :
+        """Hoàn tác nước đi gần nhất trong stack 'moves'. Trả về cột vừa được hoàn tác.
+
+        Notice: undo() không động tới history, muốn quay lại cả history thì dùng roll_back()
+        """
+
+        column = self.moves.pop()
+        height = self.heights[column] - 1
+        self.heights[column] = height
+
+        self.occupied_mask ^= self.column_bottom[column] << height
+        self.current_mask ^= self.occupied_mask
+        self._turn = -self._turn
+        self.hash_key ^= self.zobrist_pieces[self._turn][column][height] ^ self.zobrist_side
+        self.mirror_key ^= self.zobrist_mirror_pieces[self._turn][column][height] ^ self.zobrist_side
+        self._board_view = None
+        return column
+
+    def rewind(self, ply:int) :
+        """Hoàn tác liên tiếp cho tới khi stack 'moves' chỉ còn 'ply' nước đi."""
+
+        while len(self.moves) > ply :
+            self.undo()
+
     def roll_back(self, destination_step:int, erase_all_history=False):
         """
         Roll to 'destination_step'.
@@ -153,159 +477,130 @@ class ConnectFourBoard:
 
         Notice: 1 step here mean [1 RED turn, 1 YELLOW turn] a.k.a (1 cycle)  
         Notice: rollback will erase all history after the destination
+        Notice: O(k) với k là số nước đi bị huỷ, bàn cờ được undo() lại chứ không dựng lại từ snapshot
         """
         if not hasattr(self, 'history') : 
             print('Sorry, this board didn\'t save history')
             return
 
-        current_turn = self.turn
-        other_turn = -current_turn
-
-        self.history[current_turn] = self.history[current_turn][0:destination_step]
-
-        if current_turn == self.first_to_move :
-            if destination_step < -1 :
-                self.history[other_turn] = self.history[other_turn][0:destination_step + 1]
-            elif destination_step > 0 :
-                self.history[other_turn] = self.history[other_turn][0:destination_step]
+        if destination_step >= 0 :
+            ply = 2 * destination_step
         else :
-            if destination_step != -1 :
-                self.history[other_turn] = self.history[other_turn][0:destination_step+1]
+            ply = len(self.history) + 2 * destination_step
+        ply = max(0, min(ply, len(self.history), len(self.moves)))
 
-        if self.history[other_turn].size == 0 :
-            self.create_board()
-        else:
-            self.create_board(self.history[other_turn].pop())
+        self.rewind(ply)
+        self.history.truncate(ply)
 
         if erase_all_history :
-            self.history[RED] = []
-            self.history[YELLOW] = []
+            self.history.reset(self.board)
+
+    def has_alignment(self, mask:int) :
+        """Bitboard 'mask' có chứa 4 quân liên tiếp (ngang, dọc hoặc chéo) hay không."""
+
+        for shift in (1, self.column_bits, self.column_bits - 1, self.column_bits + 1) :
+            pairs = mask & (mask >> shift)
+            if pairs & (pairs >> (2 * shift)) :
+                return True
+        return False
+
+    def has_alignment_through(self, mask:int, bit:int) :
+        """Giống has_alignment nhưng chỉ xét 4 đường (ngang, dọc, 2 chéo) đi qua ô 'bit'."""
+
+        for shift in (1, self.column_bits, self.column_bits - 1, self.column_bits + 1) :
+            pairs = mask & (mask >> shift)
+            fours = pairs & (pairs >> (2 * shift))          # bit b bật <=> b, b+s, b+2s, b+3s đều là quân của mask
+            # Một đường 4 quân đi qua 'bit' phải bắt đầu tại bit - k*shift, với k = 0..3
+            if fours & (bit | (bit >> shift) | (bit >> (2 * shift)) | (bit >> (3 * shift))) :
+                return True
+        return False
+
+    @property
+    def last_move(self) :
+        """Ô (row, col) của quân vừa được đánh gần nhất, None nếu stack 'moves' rỗng."""
+
+        if not self.moves :
+            return None
+        column = self.moves[-1]
+        return self.rows - self.heights[column], column
+
+    def last_move_won(self) :
+        """Nước đi gần nhất có tạo thành 4 quân liên tiếp không. Chỉ xét các đường đi qua ô vừa đánh."""
+
+        if not self.moves :
+            return False
+
+        column = self.moves[-1]
+        # Quân vừa đánh thuộc về bên vừa đi, tức là bên KHÔNG tới lượt
+        return self.has_alignment_through(self.current_mask ^ self.occupied_mask,
+                                          self.column_bottom[column] << (self.heights[column] - 1))
 
     def check_win(self, turn:int=None, special_position:tuple[int, int]=None):
-        """Check if the given piece has won on the board."""
+        """Check if the given piece has won on the board.
+
+        If 'special_position' (row, col) is given, only the lines through that cell are checked,
+        for the color of the piece standing there.
+        """
 
         if special_position is not None :
             r = special_position[0]
             c = special_position[1]
-            
-            turn = self.board[r, c]
-            if turn == IDLE :
+
+            bit = 1 << (self.column_shift[c] + (self.rows - 1 - int(r)))
+            if not (self.occupied_mask & bit) :
                 return False
+            mask = self.current_mask if (self.current_mask & bit) else self.current_mask ^ self.occupied_mask
+            return self.has_alignment_through(mask, bit)
             
         if turn is None:
             turn = self.turn
 
-        def check_horizontal_win():
-            """Check for a horizontal win."""
-            if special_position is not None :
-                r = special_position[0]
-                for c in range(max(special_position[1] - 3, 0), min(special_position[1] + 1, self.columns - 3)):
-                    if all(self.board[r][c + i] == turn for i in range(4)):
-                        return True
-                return False
-            
-            for r in range(self.rows):
-                for c in range(self.columns - 3):
-                    if all(self.board[r][c + i] == turn for i in range(4)):
-                        return True
-            return False
-        
-        def check_vertical_win():
-            """Check for a vertical win."""
-            if special_position is not None :
-                c = special_position[1]
-                for r in range(max(special_position[0] - 3, 0), min(special_position[0] + 1, self.rows - 3)):
-                    if all(self.board[r + i][c] == turn for i in range(4)):
-                        return True
-                return False
-        
-            for r in range(self.rows - 3):
-                for c in range(self.columns):
-                    if all(self.board[r + i][c] == turn for i in range(4)):
-                        return True
-            return False
-        
-        def check_diagonal_down_win():
-            """Check for a diagonal win (top-left to bottom-right)."""
-            if special_position is not None :
-                subtract = special_position[1] - special_position[0]
-                for r in range(max(special_position[0] - 3, 0), min(special_position[0] + 1, self.rows - 3)):
-                    c = r + subtract
-                    if (r >= self.rows) :
-                        break
-                    if all(self.board[r + i][c + i] == turn for i in range(4)):
-                        return True
-
-            for r in range(self.rows - 3):
-                for c in range(self.columns - 3):
-                    if all(self.board[r + i][c + i] == turn for i in range(4)):
-                        return True
-            return False
-        
-        def check_diagonal_up_win():
-            """Check for a diagonal win (bottom-left to top-right)."""
-            if special_position is not None :
-                sum = special_position[0] + special_position[1]
-                for c in range(max(special_position[1] - 3, 0), min(special_position[1] + 1, self.columns - 3)) :
-                    r = sum - c
-                    if c >= self.columns:
-                        break
-                    if all(self.board[r - i][c + i] == turn for i in range(4)):
-                        return True
-                return False
-
-            for r in range(3, self.rows):
-                for c in range(self.columns - 3):
-                    if all(self.board[r - i][c + i] == turn for i in range(4)):
-                        return True
-            return False
-
-        return (check_horizontal_win() or 
-                check_vertical_win() or 
-                check_diagonal_down_win() or 
-                check_diagonal_up_win())
+        return self.has_alignment(self.get_mask(turn))
     
     def is_full(self) :
         """Check if the board is full of piece. There no place to keep playing"""
 
-        return np.count_nonzero(self.board) == self.board.size
+        return self.occupied_mask == self.board_mask
+
     def copy(self) :
-        clone = ConnectFourBoard(shape=self.shape, save_history=False)
-        clone.reset_game(self.turn, self.board)
+        """Bản sao của thế cờ hiện tại (không kèm history). Chỉ sao chép các bitboard, không dựng lại ma trận."""
+
+        clone = object.__new__(ConnectFourBoard)
+        clone.__dict__.update(self.__dict__)        # bitboard là int (immutable), board view là read-only nên dùng chung được
+        clone.__dict__.pop('history', None)
+        clone.heights = list(self.heights)
+        clone.moves = list(self.moves)
         return clone
     
-    def export_history(self, color, train_file_path='data/DefaultTrainingSet.npy', label_file_path='data/DefaultLabelSet.npy') :
-        """Append dữ liệu mới vào file .npy"""
-
-        if len(self.history[color]) <= 4:       # bỏ qua việc export đối với trận đấu quá ngắn (do AI lỗi)
-            return
+    def export_history(self, color, train_file_path='data/DefaultTrainingSet.npy', label_file_path='data/DefaultLabelSet.npy',
+                       writer:DatasetWriter =None) :
+        """Append dữ liệu mới vào dataset (dạng shard, xem Simulation.Dataset.DatasetWriter).
 
-        # Tách train_data và label_data từ danh sách các tuple
-        new_train_data = np.squeeze(np.array([x[0] for x in self.history[color][2:]]))      # bỏ qua 2 turn đầu mỗi bên, vì nó ko hiệu quả lắm
-        new_label_data = np.squeeze(np.array([x[1] for x in self.history[color][2:]]))
+        Truyền 'writer' để gom nhiều ván vào chung buffer (MatchMaker làm vậy), nếu không thì
+        mỗi lần gọi sẽ ghi ra một shard riêng. Không bao giờ load lại dữ liệu cũ.
+        """
 
-        if os.path.exists(train_file_path) and os.path.exists(label_file_path) :
-            # Load lại dữ liệu cũ
-            train_data = np.squeeze(np.load(train_file_path))
-            label_data = np.squeeze(np.load(label_file_path))
+        if self.history.count(color) <= 4:       # bỏ qua việc export đối với trận đấu quá ngắn (do AI lỗi)
+            return
 
-            # Append dữ liệu mới
-            new_train_data = np.concatenate((train_data, new_train_data), axis=0)
-            new_label_data = np.concatenate((label_data, new_label_data), axis=0)
+        # Tách train_data và label_data từ lịch sử (snapshot được dựng lại từ dãy nước đi)
+        new_train_data, new_label_data = self.history.samples(color, skip=2)      # bỏ qua 2 turn đầu mỗi bên, vì nó ko hiệu quả lắm
 
-        np.save(train_file_path, new_train_data)
-        np.save(label_file_path, new_label_data)
+        if writer is None :
+            with DatasetWriter(train_file_path, label_file_path) as single_writer :
+                single_writer.append(new_train_data, new_label_data)
+        else :
+            writer.append(new_train_data, new_label_data)
 
 
     def load_history_data(train_file_path='data/DefaultTrainingSet.npy', label_file_path='data/DefaultLabelSet.npy') :
-        """Khuyến khích tự viết lại hàm load, không thì bay RAM"""
+        """Dataset (file .npy nguyên khối và/hoặc các shard của DatasetWriter) dưới dạng DatasetReader.
 
-        train_data = None
-        label_data = None
+        Không load vào RAM: mọi file đều được memory-map, xem Simulation.Dataset.DatasetReader.
+        Trả về None nếu chưa có dữ liệu.
+        """
 
-        if os.path.exists(train_file_path) and os.path.exists(label_file_path):
-                # Load lại dữ liệu cũ
-            train_data = np.load(train_file_path)
-            label_data = np.load(label_file_path)
-        
-        return train_data, label_data
+        try :
+            return DatasetReader([(train_file_path, label_file_path)])
+        except ValueError :
+            return None
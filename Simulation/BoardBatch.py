@@ -0,0 +1,125 @@
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Constant import RED, YELLOW, IDLE
+from Simulation.Board import ConnectFourBoard, winning_windows
+
+
+class BoardBatch:
+    ###
+    #
+    #  N ván cờ được lưu chung trong một mảng (N, rows, columns) int8 và được đi song song
+    #  bằng các phép toán NumPy, thay vì từng object ConnectFourBoard một.
+    #  Dùng cho sinh dữ liệu self-play và random rollout số lượng lớn.
+    #
+    #   Attributes:
+    #       size            :   số ván cờ N
+    #       rows x columns  :   kích thước bàn cờ (giống ConnectFourBoard)
+    #       boards          :   (N, rows, columns) int8, cùng quy ước RED/YELLOW/IDLE với ConnectFourBoard.board
+    #       heights         :   (N, columns) số quân hiện có ở mỗi cột
+    #       turn            :   (N,) lượt hiện tại của từng ván
+    #       windows         :   (n_windows, 4) chỉ số phẳng của các cửa sổ 4 ô, xem Board.winning_windows
+    #
+    #   Notices:
+    #       drop() không tự bỏ qua ván đã kết thúc, bên gọi lọc bằng done() (hoặc truyền cột -1).
+    ###
+
+    def __init__(self, size:int, shape:tuple[int, int] =(6, 7), first_to_move:int =RED):
+        self.size = size
+        self.rows = shape[0]
+        self.columns = shape[1]
+        self.shape = shape
+        self.first_to_move = first_to_move
+
+        self.windows = winning_windows(shape)
+        self.reset()
+
+    @classmethod
+    def from_boards(cls, games:list[ConnectFourBoard]) :
+        """Gom nhiều ConnectFourBoard (cùng kích thước) thành một batch."""
+
+        batch = cls(len(games), shape=games[0].shape)
+        for i, game in enumerate(games) :
+            batch.boards[i] = game.board
+            batch.heights[i] = game.heights
+            batch.turn[i] = game.turn
+        return batch
+
+    def reset(self) :
+        """Đưa toàn bộ N ván về bàn cờ trống."""
+
+        self.boards = np.zeros((self.size, self.rows, self.columns), dtype=np.int8)
+        self.heights = np.zeros((self.size, self.columns), dtype=np.int8)
+        self.turn = np.full((self.size,), self.first_to_move, dtype=np.int8)
+
+    def to_board(self, index:int) :
+        """ConnectFourBoard tương ứng với ván thứ 'index' (không kèm stack 'moves')."""
+
+        game = ConnectFourBoard(shape=self.shape)
+        game.reset_game(int(self.turn[index]), self.boards[index])
+        return game
+
+    def legal_mask(self) :
+        """(N, columns) bool: cột nào của ván nào còn đánh được."""
+
+        return self.heights < self.rows
+
+    def is_full(self) :
+        """(N,) bool: ván nào đã kín bàn cờ."""
+
+        return (self.heights == self.rows).all(axis=1)
+
+    def winners(self) :
+        """(N,) int8: RED/YELLOW nếu ván đó đã có 4 quân liên tiếp, ngược lại IDLE."""
+
+        sums = self.boards.reshape(self.size, -1)[:, self.windows].sum(axis=2, dtype=np.int8)
+        winners = np.full((self.size,), IDLE, dtype=np.int8)
+        winners[(sums == 4 * RED).any(axis=1)] = RED
+        winners[(sums == 4 * YELLOW).any(axis=1)] = YELLOW
+        return winners
+
+    def done(self) :
+        """(N,) bool: ván nào đã kết thúc (có người thắng hoặc hết chỗ)."""
+
+        return (self.winners() != IDLE) | self.is_full()
+
+    def drop(self, cols:np.ndarray) :
+        """Mỗi ván i thả một quân của bên turn[i] vào cột cols[i]. Cột âm nghĩa là bỏ qua ván đó.
+
+        Returns:
+            (N,) bool: ván nào thực sự đã được đánh (cột hợp lệ và còn chỗ)
+        """
+
+        cols = np.asarray(cols, dtype=np.intp)
+        games = np.arange(self.size)
+        valid = (cols >= 0) & (cols < self.columns)
+        valid[valid] &= self.heights[games[valid], cols[valid]] < self.rows
+
+        games, cols = games[valid], cols[valid]
+        heights = self.heights[games, cols]
+
+        self.boards[games, self.rows - 1 - heights, cols] = self.turn[games]
+        self.heights[games, cols] = heights + 1
+        self.turn[games] = -self.turn[games]
+        return valid
+
+    def random_moves(self, rng:np.random.Generator =None) :
+        """(N,) một cột hợp lệ ngẫu nhiên cho mỗi ván, -1 nếu ván đó đã kín."""
+
+        rng = np.random.default_rng() if rng is None else rng
+        legal = self.legal_mask()
+        choice = np.argmax(rng.random((self.size, self.columns)) * legal, axis=1)
+        return np.where(legal.any(axis=1), choice, -1)
+
+    def rollout(self, rng:np.random.Generator =None) :
+        """Đánh ngẫu nhiên tất cả các ván cho tới khi kết thúc. Trả về winners() lúc kết thúc."""
+
+        active = ~self.done()
+        while active.any() :
+            cols = np.where(active, self.random_moves(rng), -1)
+            self.drop(cols)
+            active &= ~self.done()
+        return self.winners()
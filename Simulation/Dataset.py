@@ -0,0 +1,395 @@
+import json
+import numpy as np
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Constant import RED, YELLOW
+
+
+def shard_path(file_path:str, index:int) :
+    """'data/Train.npy' -> 'data/Train.00003.npy'"""
+
+    stem, ext = os.path.splitext(file_path)
+    return f'{stem}.{index:05d}{ext or ".npy"}'
+
+def index_path(file_path:str) :
+    """'data/Train.npy' -> 'data/Train.index.jsonl' (danh sách shard của dataset)"""
+
+    return os.path.splitext(file_path)[0] + '.index.jsonl'
+
+def read_index(train_file_path:str) :
+    """Các record {'train', 'label', 'count'} của dataset dạng shard, theo thứ tự đã ghi. [] nếu chưa có."""
+
+    path = index_path(train_file_path)
+    if not os.path.exists(path) :
+        return []
+
+    folder = os.path.dirname(os.path.abspath(path))
+    records = []
+    with open(path, 'r') as f :
+        for line in f :
+            if line.strip() :
+                record = json.loads(line)
+                record['train'] = os.path.join(folder, record['train'])
+                record['label'] = os.path.join(folder, record['label'])
+                records.append(record)
+    return records
+
+
+class DatasetWriter:
+    ###
+    #
+    #  Ghi dữ liệu training theo kiểu append-only.
+    #  Mẫu mới được gom vào buffer trong RAM, đủ 'flush_size' mẫu thì ghi ra một cặp shard mới.
+    #  Dữ liệu cũ không bao giờ bị đọc lại hay ghi đè, nên chi phí mỗi ván đấu là hằng số
+    #  dù dataset đã lớn tới đâu.
+    #
+    #   Files (ví dụ train_file_path = 'data/Train.npy', label_file_path = 'data/Label.npy'):
+    #       data/Train.00000.npy, data/Train.00001.npy, ...     :   các shard train
+    #       data/Label.00000.npy, data/Label.00001.npy, ...     :   các shard label tương ứng
+    #       data/Train.index.jsonl                              :   mỗi dòng là 1 shard: {"train", "label", "count"}
+    #
+    #   Notices:
+    #       Nhớ gọi close() (hoặc dùng 'with') để ghi nốt phần còn trong buffer.
+    #       File .npy nguyên khối cũ (nếu có) được giữ nguyên, DatasetReader đọc được cả hai.
+    ###
+
+    def __init__(self, train_file_path:str, label_file_path:str, flush_size:int =4096):
+        self.train_file_path = train_file_path
+        self.label_file_path = label_file_path
+        self.flush_size = flush_size
+
+        folder = os.path.dirname(os.path.abspath(train_file_path))
+        os.makedirs(folder, exist_ok=True)
+
+        self.next_shard = len(read_index(train_file_path))      # ghi tiếp sau các shard đã có
+        self.samples_written = 0
+
+        self._train_buffer = []
+        self._label_buffer = []
+        self._buffered = 0
+
+    def append(self, train_data:np.array, label_data:np.array) :
+        """Thêm một lô mẫu (cùng số lượng ở axis 0). Chỉ ghi ra đĩa khi buffer đủ 'flush_size' mẫu."""
+
+        if len(train_data) != len(label_data) :
+            raise ValueError(f'train/label size mismatch: {len(train_data)} vs {len(label_data)}')
+        if len(train_data) == 0 :
+            return
+
+        self._train_buffer.append(np.asarray(train_data))
+        self._label_buffer.append(np.asarray(label_data))
+        self._buffered += len(train_data)
+
+        if self._buffered >= self.flush_size :
+            self.flush()
+
+    def flush(self) :
+        """Ghi toàn bộ buffer ra một cặp shard mới và thêm 1 dòng vào file index."""
+
+        if self._buffered == 0 :
+            return
+
+        train_path = shard_path(self.train_file_path, self.next_shard)
+        label_path = shard_path(self.label_file_path, self.next_shard)
+        np.save(train_path, np.concatenate(self._train_buffer, axis=0))
+        np.save(label_path, np.concatenate(self._label_buffer, axis=0))
+
+        # Index chỉ được ghi sau khi shard đã nằm trên đĩa, nên không bao giờ trỏ tới shard dở dang
+        folder = os.path.dirname(os.path.abspath(train_path))
+        record = {'train': os.path.relpath(train_path, folder),
+                  'label': os.path.relpath(label_path, folder),
+                  'count': self._buffered}
+        with open(index_path(self.train_file_path), 'a') as f :
+            f.write(json.dumps(record) + '\n')
+
+        self.next_shard += 1
+        self.samples_written += self._buffered
+        self._train_buffer = []
+        self._label_buffer = []
+        self._buffered = 0
+
+    def close(self) :
+        self.flush()
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) :
+        self.close()
+
+
+def memmap_npz_member(npz_path:str, member:str) :
+    """Memory-map mảng 'member' trong file .npz. Chỉ làm được với npz không nén (np.savez), nén thì load vào RAM."""
+
+    import zipfile
+
+    with zipfile.ZipFile(npz_path) as archive :
+        info = archive.getinfo(member + '.npy')
+        if info.compress_type != zipfile.ZIP_STORED :
+            with archive.open(info) as f :
+                return np.lib.format.read_array(f)
+
+    with open(npz_path, 'rb') as f :
+        # Local file header: 30 byte cố định + tên file + extra field, sau đó mới tới nội dung file .npy
+        f.seek(info.header_offset)
+        header = f.read(30)
+        name_length = int.from_bytes(header[26:28], 'little')
+        extra_length = int.from_bytes(header[28:30], 'little')
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+
+        if np.lib.format.read_magic(f) == (1, 0) :
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else :
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    return np.memmap(npz_path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+
+###
+#   Định dạng nén (packed) cho dataset, file '.packed.npz' (np.savez, không nén zip nên vẫn memory-map được):
+#       red, yellow     :   (N,) uint64, mỗi bàn cờ là 2 bit-plane, bit thứ (r * columns + c) ứng với ô (r, c)
+#       label_index     :   (N,) int8, cột được chọn, khi label gốc là one-hot
+#       label           :   (N, columns), khi label gốc là điểm đánh giá (ví dụ của minimax): float16 nếu chỉ gồm 0/1,
+#                           ngược lại float32 (hoặc giữ dtype gốc nếu float32 làm mất chính xác)
+#       shape           :   (rows, columns)
+#   Mỗi mẫu 6x7 chỉ còn 17 byte (so với 336 byte float64 + 28 byte label int32).
+#   Bàn cờ chỉ được bung lại thành (N, rows, columns) khi lấy batch.
+###
+
+def pack_boards(boards:np.ndarray) :
+    """(N, rows, columns) RED/YELLOW/IDLE -> 2 bit-plane (red, yellow) dạng uint64. Tối đa 64 ô."""
+
+    boards = np.asarray(boards)
+    flat = boards.reshape(len(boards), -1)
+    if flat.shape[1] > 64 :
+        raise ValueError(f'Board with {flat.shape[1]} cells does not fit into 64-bit planes')
+
+    def plane(cells:np.ndarray) :
+        bits = np.zeros((len(cells), 64), dtype=np.uint8)
+        bits[:, :cells.shape[1]] = cells
+        return np.packbits(bits, axis=1, bitorder='little').view('<u8').reshape(-1)
+
+    return plane(flat == RED), plane(flat == YELLOW)
+
+def unpack_boards(red:np.ndarray, yellow:np.ndarray, shape:tuple[int, int]) :
+    """Ngược lại của pack_boards: trả về (N, rows, columns) int8."""
+
+    cells = shape[0] * shape[1]
+
+    def plane(bits:np.ndarray) :
+        raw = np.ascontiguousarray(bits, dtype='<u8').view(np.uint8).reshape(-1, 8)
+        return np.unpackbits(raw, axis=1, bitorder='little')[:, :cells].astype(np.int8)
+
+    boards = plane(red) * np.int8(RED) + plane(yellow) * np.int8(YELLOW)
+    return boards.reshape((-1,) + tuple(shape))
+
+def compact_labels(label_data:np.ndarray) :
+    """Label dạng điểm ở dtype nhỏ nhất không làm mất giá trị: float16 cho 0/1, float32, hoặc dtype gốc."""
+
+    if np.all((label_data == 0) | (label_data == 1)) :
+        return label_data.astype(np.float16)
+    compact = label_data.astype(np.float32)
+    if np.array_equal(compact, label_data) :
+        return compact
+    return label_data
+
+def save_packed(path:str, train_data:np.ndarray, label_data:np.ndarray) :
+    """Ghi một dataset (train, label) ra file '.packed.npz'."""
+
+    train_data = np.asarray(train_data)
+    label_data = np.asarray(label_data)
+    red, yellow = pack_boards(train_data)
+    arrays = {'red': red, 'yellow': yellow, 'shape': np.array(train_data.shape[1:], dtype=np.int64)}
+
+    one_hot = label_data.ndim == 2 and np.all((label_data == 0) | (label_data == 1)) and np.all(label_data.sum(axis=1) == 1)
+    if one_hot :
+        arrays['label_index'] = np.argmax(label_data, axis=1).astype(np.int8)
+        arrays['columns'] = np.array(label_data.shape[1], dtype=np.int64)
+    else :
+        arrays['label'] = compact_labels(label_data)
+
+    np.savez(path, **arrays)
+
+def is_packed(npz_path:str) :
+    """File .npz có phải định dạng packed không."""
+
+    import zipfile
+
+    with zipfile.ZipFile(npz_path) as archive :
+        return 'red.npy' in archive.namelist()
+
+
+class PackedBoards:
+    ###
+    #  Mảng "ảo" (N, rows, columns) trên 2 bit-plane đã memory-map, chỉ bung ra int8 khi được index.
+    ###
+
+    def __init__(self, red:np.ndarray, yellow:np.ndarray, shape:tuple[int, int]):
+        self.red = red
+        self.yellow = yellow
+        self.shape = (len(red),) + tuple(shape)
+
+    def __len__(self) :
+        return len(self.red)
+
+    def __getitem__(self, index) :
+        if np.isscalar(index) :
+            return unpack_boards(self.red[index:index + 1], self.yellow[index:index + 1], self.shape[1:])[0]
+        return unpack_boards(self.red[index], self.yellow[index], self.shape[1:])
+
+
+class OneHotLabels:
+    ###
+    #  Mảng "ảo" (N, columns) one-hot trên chỉ số cột int8, chỉ bung ra khi được index.
+    ###
+
+    def __init__(self, label_index:np.ndarray, columns:int):
+        self.label_index = label_index
+        self.shape = (len(label_index), columns)
+
+    def __len__(self) :
+        return len(self.label_index)
+
+    def __getitem__(self, index) :
+        return np.eye(self.shape[1], dtype=np.float32)[self.label_index[index]]
+
+def open_packed(npz_path:str) :
+    """(train, label) của file '.packed.npz', cả hai đều chỉ được giải nén khi lấy batch."""
+
+    with np.load(npz_path) as archive :
+        shape = tuple(int(x) for x in archive['shape'])
+        has_index = 'label_index' in archive.files
+        columns = int(archive['columns']) if has_index else None
+
+    train = PackedBoards(memmap_npz_member(npz_path, 'red'), memmap_npz_member(npz_path, 'yellow'), shape)
+
+    if has_index :
+        label = OneHotLabels(memmap_npz_member(npz_path, 'label_index'), columns)
+    else :
+        label = memmap_npz_member(npz_path, 'label')
+    return train, label
+
+
+class DatasetReader:
+    ###
+    #
+    #  Đọc dataset training mà không load toàn bộ vào RAM: mọi file đều được memory-map,
+    #  chỉ những mẫu thuộc batch đang cần mới thực sự được đọc từ đĩa.
+    #
+    #   Sources (có thể trộn lẫn, nhưng các mẫu phải cùng kích thước bàn cờ):
+    #       ('Train.npy', 'Label.npy')      :   cặp file .npy nguyên khối (ví dụ DL/data/*_RandomizeMinimax.npy)
+    #       'data_MO_MO.npz'                :   file .npz chứa 2 mảng train_key / label_key (mặc định 'X', 'y')
+    #       'data_MO_MO.packed.npz'         :   file định dạng packed (xem save_packed), bung ra khi lấy batch
+    #       ('Train.npy', 'Label.npy')      :   nếu có 'Train.index.jsonl' thì đọc luôn các shard của DatasetWriter
+    #
+    #   Attributes:
+    #       parts       :   list các cặp (train, label) đã được memory-map
+    #       offsets     :   chỉ số mẫu đầu tiên của từng part, để tra cứu ngẫu nhiên
+    #       sample_shape:   kích thước 1 mẫu train (ví dụ (6, 7))
+    ###
+
+    def __init__(self, sources:list, train_key:str ='X', label_key:str ='y'):
+        self.parts = []
+
+        for source in sources :
+            if isinstance(source, str) and source.endswith('.npz') :
+                if is_packed(source) :
+                    self.parts.append(open_packed(source))
+                else :
+                    self.parts.append((memmap_npz_member(source, train_key), memmap_npz_member(source, label_key)))
+                continue
+
+            train_path, label_path = source
+            if os.path.exists(train_path) and os.path.exists(label_path) :
+                self.parts.append((np.load(train_path, mmap_mode='r'), np.load(label_path, mmap_mode='r')))
+            for record in read_index(train_path) :
+                self.parts.append((np.load(record['train'], mmap_mode='r'), np.load(record['label'], mmap_mode='r')))
+
+        self.parts = [(train, label) for train, label in self.parts if len(train) > 0]
+        if not self.parts :
+            raise ValueError(f'No training data found in {sources}')
+
+        shapes = {train.shape[1:] for train, _ in self.parts}
+        if len(shapes) != 1 :
+            raise ValueError(f'Sources have different sample shapes: {shapes}')
+        self.sample_shape = shapes.pop()
+
+        for train, label in self.parts :
+            if len(train) != len(label) :
+                raise ValueError(f'train/label size mismatch: {len(train)} vs {len(label)}')
+
+        self.offsets = np.cumsum([0] + [len(train) for train, _ in self.parts])
+
+    def __len__(self) :
+        return int(self.offsets[-1])
+
+    def __getitem__(self, index) :
+        """Truy cập ngẫu nhiên: index là số nguyên hoặc mảng chỉ số. Trả về (train, label)."""
+
+        if np.isscalar(index) :
+            index = int(index) % len(self)
+            part = int(np.searchsorted(self.offsets, index, side='right')) - 1
+            train, label = self.parts[part]
+            local = index - self.offsets[part]
+            return np.asarray(train[local]), np.asarray(label[local])
+
+        return self.gather(np.asarray(index))
+
+    def gather(self, index:np.ndarray) :
+        """(train, label) của các mẫu 'index', giữ nguyên thứ tự. Mỗi part chỉ đọc các dòng cần thiết."""
+
+        part_of = np.searchsorted(self.offsets, index, side='right') - 1
+        train_batch = None
+        label_batch = None
+
+        for part in np.unique(part_of) :
+            train, label = self.parts[part]
+            selected = np.flatnonzero(part_of == part)
+            local = index[selected] - self.offsets[part]
+
+            # Đọc theo thứ tự tăng dần trên đĩa rồi mới xếp lại đúng vị trí trong batch
+            order = np.argsort(local, kind='stable')
+            rows_train = train[local[order]]
+            rows_label = label[local[order]]
+
+            if train_batch is None :
+                train_batch = np.empty((len(index),) + rows_train.shape[1:], dtype=rows_train.dtype)
+                label_batch = np.empty((len(index),) + rows_label.shape[1:], dtype=rows_label.dtype)
+            train_batch[selected[order]] = rows_train
+            label_batch[selected[order]] = rows_label
+
+        return train_batch, label_batch
+
+    def batches(self, batch_size:int =64, shuffle:bool =True, seed:int =None, drop_last:bool =False) :
+        """Duyệt 1 epoch theo mini-batch (xáo trộn nếu shuffle). Yield (train, label)."""
+
+        order = np.arange(len(self))
+        if shuffle :
+            np.random.default_rng(seed).shuffle(order)
+
+        for start in range(0, len(order), batch_size) :
+            index = order[start:start + batch_size]
+            if drop_last and len(index) < batch_size :
+                return
+            yield self.gather(index)
+
+    def steps_per_epoch(self, batch_size:int =64) :
+        return (len(self) + batch_size - 1) // batch_size
+
+    def keras_generator(self, batch_size:int =64, shuffle:bool =True, seed:int =None, add_channel:bool =True) :
+        """Generator vô hạn cho model.fit(...): mỗi epoch xáo lại, train được ép kiểu float32 và thêm trục channel."""
+
+        epoch = 0
+        while True :
+            epoch_seed = None if seed is None else seed + epoch
+            for train, label in self.batches(batch_size, shuffle=shuffle, seed=epoch_seed) :
+                train = train.astype(np.float32)
+                if add_channel :
+                    train = train[..., np.newaxis]
+                yield train, label.astype(np.float32)
+            epoch += 1
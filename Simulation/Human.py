@@ -30,4 +30,7 @@ class Hugeman :
                 elif event.type == pg.MOUSEBUTTONDOWN:
                     pos_x = event.pos[0]
                     col = pos_x // square
-                    return col, None
\ No newline at end of file
+                    return col, None
+
+            # Nhường CPU (và GIL) cho AI đang ponder trong lúc chờ người chơi
+            pg.time.wait(10)
\ No newline at end of file
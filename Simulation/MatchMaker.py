@@ -9,6 +9,7 @@ from enum import Enum
 import traceback
 import numpy as np
 import pickle
+import json
 
 
 import sys
@@ -17,6 +18,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from Constant import RED, YELLOW, IDLE,  WIDTH, FIRST_MOVING
 from Simulation.Board import ConnectFourBoard
+from Simulation.Dataset import DatasetWriter
+from AI_AlphaGo.search_stats import summarize
 from AI_AlphaGo.think_one import Think_One
 from AI_AlphaGo.think_two import Think_Two
 from AI_AlphaGo.think_three import Think_Three
@@ -63,6 +66,12 @@ class MatchMaker:
     #           Player.set_color(int)             :       setup màu cho player, đề phòng khi cả 2 mặc định chơi cùng 1 màu.
     #           Player.evaluate()                 :       kết quả đánh giá lựa chọn. Nếu ko thực hiện đánh giá thì 'return None'. Mặc định là cột vừa đi bằng 1, còn lại bằng 0.
     #           Player.get_move(ConnectFourBoard) :       return column, evaluate()     ->      Cột muốn đánh và kết quả đánh giá, từ input(Board.ConnectFourBoard)
+    #       Không bắt buộc:
+    #           Player.last_stats                 :       SearchStats của nước vừa đi (AI_AlphaGo/search_stats.py)
+    #           Player.new_game()                 :       xoá trạng thái giữ qua các nước đi, gọi ở đầu mỗi ván
+    #           Player.close()                    :       giải phóng tài nguyên sau loạt trận
+    #
+    #   stats_export_path: file .jsonl, mỗi ván ghi 1 dòng gồm thống kê gộp của từng người chơi và của từng nước đi
     ###
     
     def __init__(self,
@@ -73,7 +82,8 @@ class MatchMaker:
                  train_export_path:str =None,
                  label_export_path:str =None,
                  sleep_between_games=1,
-                 display_turn_runtime=True):
+                 display_turn_runtime=True,
+                 stats_export_path:str =None):
         """Initialize the AI vs AI game runner.
         
         Args:
@@ -86,7 +96,10 @@ class MatchMaker:
             ai2_timeout: Maximum time in seconds for AI 2 to compute a move
         """
 
-        self.game = ConnectFourBoard(first_to_move=FIRST_MOVING)
+        # Chỉ cần lưu history khi có export dữ liệu training
+        self.train_export_path = train_export_path
+        self.label_export_path = label_export_path
+        self.game = ConnectFourBoard(first_to_move=FIRST_MOVING, save_history=train_export_path is not None)
 
         # Setup user interface window
         self.width = width
@@ -108,6 +121,11 @@ class MatchMaker:
         self.stats = {"ai1_wins": 0, "ai2_wins": 0, "draws": 0}
         self.history_games = []
 
+        # Thống kê search: move_stats của ván đang chơi, search_stats là bản gộp của các ván đã xong
+        self.stats_export_path = stats_export_path
+        self.move_stats = []
+        self.search_stats = []
+
         
         # Initialize pygame if needed
         if self.display_game:
@@ -204,7 +222,13 @@ class MatchMaker:
         # Reset game state
         self.player1.set_color(FIRST_MOVING)
         self.player2.set_color(-FIRST_MOVING)
+
+        # Player giữ trạng thái search qua các nước đi (TT, history, ...) được xoá ở đầu mỗi ván
+        for player in (self.player1, self.player2) :
+            if hasattr(player, 'new_game') :
+                player.new_game()
         self.game.reset_game(firstMoving = FIRST_MOVING)
+        self.move_stats = []
         
         self.draw_game()
         winner = 0
@@ -242,8 +266,11 @@ class MatchMaker:
                     msg = f'Invalid move response from {current_player.name} at column: {col}'
                     print(self.game.board)
                     raise Exception(msg)
+
+                search_stats = getattr(current_player, 'last_stats', None)
                     
             except Exception as e:
+                search_stats = None     # last_stats là của nước trước / của lần tìm bị bỏ, không phải của nước ngẫu nhiên
                 print(self.game.board)
                 print(f"Error in AI move generation: {traceback.TracebackException.from_exception(e)}")
                 traceback.print_exc()
@@ -285,10 +312,16 @@ class MatchMaker:
                 self.stats["draws"] += 1
 
             # Record actual compute time for debugging
+            compute_time = time.time() - move_start_time
+            record = {'color': current_turn, 'column': int(col), 'wall_time': round(compute_time, 6)}
+            if search_stats is not None :
+                record.update(search_stats.as_dict())
+            self.move_stats.append(record)
+
             if self.display_turn_runtime :
-                compute_time = time.time() - move_start_time
                 if compute_time > 0.0:  # Only report if it took more than the threshold
-                    print(f"{current_player.name[:40].ljust(40)} computed move in {compute_time:.2f}s")
+                    detail = f" ({search_stats})" if search_stats is not None else ""
+                    print(f"{current_player.name[:40].ljust(40)} computed move in {compute_time:.2f}s{detail}")
 
             # Add delay for visualization
             if self.display_game and self.delay > 0:
@@ -309,6 +342,11 @@ class MatchMaker:
         """Run multiple games between the AI agents."""
         ai1_name = self.player1.name
         ai2_name = self.player2.name
+
+        # Một writer cho cả loạt trận: dữ liệu được gom theo lô rồi ghi ra shard mới, không ghi lại file cũ
+        writer = None
+        if self.train_export_path is not None :
+            writer = DatasetWriter(self.train_export_path, self.label_export_path)
         
         for i in range(1, self.games+1):
             start_time = time.time()
@@ -316,7 +354,8 @@ class MatchMaker:
                 pg.display.set_caption(f"AI vs AI - Game {i}/{self.games} - {ai1_name} vs {ai2_name}")
             
             result = self.play_game()
-            self.history_games.append(self.game)
+            if hasattr(self.game, 'history') :
+                self.history_games.append(self.game.history.copy())      # chỉ giữ dãy nước đi, không giữ snapshot bàn cờ
             if result is None:  # User quit
                 break
                 
@@ -330,10 +369,19 @@ class MatchMaker:
                     f"Draws: {self.stats['draws']:>3}, " +
                     f"running {playturn} turn in {playtime} seconds")
                 
-            if self.train_export_path is not None :
-                if winner != 0 :
-                    self.game.export_history(winner, train_file_path=self.train_export_path,
-                                                    label_file_path=self.label_export_path)
+            if writer is not None :
+                if result != 0 :
+                    self.game.export_history(result, writer=writer)
+
+            self.record_search_stats(i, result, playtime)
+
+        if writer is not None :
+            writer.close()
+
+        # Player có tài nguyên riêng (helper process, shared memory, ...) được giải phóng sau loạt trận
+        for player in (self.player1, self.player2) :
+            if hasattr(player, 'close') :
+                player.close()
                 
 
         if self.display_game :
@@ -351,6 +399,22 @@ class MatchMaker:
         if self.display_game:
             pg.quit()
 
+    def record_search_stats(self, index:int, winner:int, playtime:float) :
+        """Gộp thống kê search của ván vừa xong theo từng người chơi, ghi thêm 1 dòng vào stats_export_path."""
+
+        players = {}
+        for key, player in (('player1', self.player1), ('player2', self.player2)) :
+            moves = [move for move in self.move_stats if move['color'] == player.color and 'nodes' in move]
+            players[key] = {'name': player.name, 'color': player.color, **summarize(moves)}
+
+        record = {'game': index, 'winner': winner, 'plies': len(self.move_stats), 'time': round(playtime, 6),
+                  'players': players, 'moves': self.move_stats}
+        self.search_stats.append({key: value for key, value in record.items() if key != 'moves'})
+
+        if self.stats_export_path is not None :
+            with open(self.stats_export_path, 'a') as f :
+                f.write(json.dumps(record) + '\n')
+
     def prepare_training_data(self):
         """
         Chỉ lấy dữ liệu từ người chiến thắng
@@ -361,22 +425,20 @@ class MatchMaker:
         X = []
         y = []
         history_games = self.history_games
-        for game in history_games:
+        for history in history_games:
             # Xác định người chiến thắng
-            winner = None
-            if game.check_win(RED):
-                winner = RED
-            elif game.check_win(YELLOW):
-                winner = YELLOW
-            else:
+            winner = history.winner()
+            if winner == IDLE:
                 continue  # Bỏ qua nếu hòa
                 
             # Chỉ lấy các nước đi của người thắng
-            for state, move_valuated in game.history[winner]:
-                X.append(state)
-                y.append(move_valuated)
-        
-        return np.array(X), np.array(y)
+            states, move_valuated = history.samples(winner)
+            X.append(states)
+            y.append(move_valuated)
+
+        if not X:
+            return np.array(X), np.array(y)
+        return np.concatenate(X), np.concatenate(y)
 # Chưa chỉnh lại cmd
 def main():
     # Parse command line arguments
@@ -447,4 +509,5 @@ if __name__ == '__main__':
     #     pickle.dump((X, y), f)
 
 
-    print('\n\n', ai_vs_ai.player2.stat)
\ No newline at end of file
+    for record in ai_vs_ai.search_stats :
+        print('\n\n', record['players']['player2'])
\ No newline at end of file